@@ -2,11 +2,17 @@
 Streamlit app for PDF Question Extraction and RAG-based Answering.
 """
 import streamlit as st
+from streamlit.runtime.scriptrunner import (
+    RerunException, StopException, add_script_run_ctx, get_script_run_ctx
+)
 import logging
-import json
+import orjson
 import os
 from pathlib import Path
 import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 # Load environment variables from .env file for local development
 try:
@@ -17,15 +23,17 @@ except ImportError:
     pass
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+from config import API_CONFIG, PROCESSING_CONFIG, configure_logging
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Import our modules
-from utils.pdf_processor import process_uploaded_pdf
+from utils import content_cache
+from utils.pdf_processor import process_pdf_bytes
 from services.vlm_service import extract_questions_from_images, questions_to_json
 from services.knowledge_processor import process_knowledge_base
-from services.vector_store import setup_vector_store
-from services.rag_agent import answer_all_questions
+from services.vector_store import setup_vector_store, compute_kb_signature
+from services.rag_agent import RAGAgent, answer_all_questions_async
 from utils.pdf_generator import generate_answer_pdf, save_json_backup
 
 # Page configuration
@@ -36,6 +44,72 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_data(show_spinner=False)
+def load_pdf(pdf_bytes: bytes):
+    """Render an uploaded PDF once per distinct file across reruns."""
+    return process_pdf_bytes(pdf_bytes)
+
+@st.cache_data(show_spinner=False)
+def load_knowledge_chunks(kb_hash: str, _kb_path: str):
+    """Chunk and embed a knowledge base once per distinct file across reruns."""
+    chunker = "semantic" if PROCESSING_CONFIG.semantic_chunking else "paragraph"
+    chunks_key = f"chunks:{kb_hash}:{API_CONFIG.cohere_embed_model}:{chunker}:{PROCESSING_CONFIG.chunk_size}:{PROCESSING_CONFIG.chunk_overlap}"
+    chunks = content_cache.get(chunks_key)
+    if chunks is None:
+        chunks = process_knowledge_base(_kb_path)
+        content_cache.put(chunks_key, chunks)
+    return chunks
+
+def prepare_knowledge_base(kb_hash: str, kb_path: str, force_recreate: bool):
+    """Chunk and embed the knowledge base and load it into the vector store."""
+    chunks = load_knowledge_chunks(kb_hash, kb_path)
+    # Every knowledge base shares one collection, so its signature is checked on every
+    # run; reloading only happens when another knowledge base was stored since
+    vector_store = setup_vector_store(chunks, force_recreate=force_recreate)
+    return chunks, vector_store
+
+def get_rag_agent(vector_store, kb_hash: str, kb_signature: str) -> RAGAgent:
+    """Reuse this session's RAG agent, and its retrieval caches, while the knowledge base is unchanged."""
+    agent = st.session_state.get("rag_agent")
+    if agent is None or st.session_state.get("rag_agent_kb") != (kb_hash, kb_signature):
+        agent = RAGAgent(vector_store, cache_namespace=kb_hash)
+        st.session_state.rag_agent = agent
+        st.session_state.rag_agent_kb = (kb_hash, kb_signature)
+    else:
+        agent.vector_store = vector_store
+    return agent
+
+def with_script_run_ctx(func):
+    """Let a worker thread use Streamlit caches, which need the script run context."""
+    ctx = get_script_run_ctx()
+
+    def wrapper(*args, **kwargs):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return func(*args, **kwargs)
+
+    return wrapper
+
+def wait_for_future(future, status_text, message: str):
+    """
+    Wait for a background task without blocking a Cancel click.
+
+    Streamlit only stops a script run when the run next touches the UI, so the
+    status text is refreshed while waiting.
+
+    Args:
+        future: Future of the background task
+        status_text: Placeholder showing the current step
+        message: Status shown while waiting
+
+    Returns:
+        Result of the future
+    """
+    while True:
+        try:
+            return future.result(timeout=0.5)
+        except FutureTimeoutError:
+            status_text.text(message)
+
 def main():
     """Main Streamlit application."""
     st.title("📚 PDF Question Extraction & RAG Answering System")
@@ -80,10 +154,10 @@ def main():
         if uploaded_pdf is not None:
             st.success(f"✅ PDF uploaded: {uploaded_pdf.name}")
 
-            # Display PDF info
+            # Display PDF info; the rendered pages are reused by the pipeline
             with st.expander("📊 PDF Information"):
                 try:
-                    images, pdf_info = process_uploaded_pdf(uploaded_pdf)
+                    images, pdf_info = load_pdf(uploaded_pdf.getvalue())
                     st.json(pdf_info)
                     st.info(f"📄 Pages: {pdf_info['page_count']}")
                 except Exception as e:
@@ -100,36 +174,43 @@ def main():
         st.header("🚀 Start Processing")
 
         if st.button("🔄 Process PDF and Generate Answers", type="primary"):
-            process_pipeline(uploaded_pdf, kb_file, status_container, force_recreate_db, save_intermediate)
+            process_pipeline(
+                images,
+                pdf_info,
+                content_cache.content_hash(uploaded_pdf.getvalue()),
+                uploaded_pdf.name,
+                kb_file,
+                status_container,
+                force_recreate_db,
+                save_intermediate
+            )
 
-def process_pipeline(uploaded_pdf, kb_file, status_container, force_recreate_db, save_intermediate):
+def process_pipeline(images, pdf_info, pdf_hash, uploaded_pdf_name, kb_file, status_container, force_recreate_db, save_intermediate):
     """Execute the complete processing pipeline."""
+    start_time = time.perf_counter()
 
     with status_container:
         progress_bar = st.progress(0)
         status_text = st.empty()
 
+        # Clicking starts a new script run, which stops this one at its next UI
+        # update and abandons the in-flight VLM and LLM requests
+        st.button("⏹️ Cancel", key="cancel_processing")
+
+        def progress_range(start: int, end: int, label: str):
+            """Build a progress callback that maps (done, total) onto [start, end]."""
+            def update(done: int, total: int):
+                progress_bar.progress(start + int((end - start) * done / total))
+                status_text.text(f"{label} ({done}/{total})...")
+            return update
+
+        executor = None
         try:
-            # Step 1: Process PDF to images
-            status_text.text("📄 Converting PDF to images...")
+            # Step 1: PDF pages were rendered once when the file was uploaded
             progress_bar.progress(10)
-
-            images, pdf_info = process_uploaded_pdf(uploaded_pdf)
             st.success(f"✅ Converted {len(images)} pages to images")
 
-            # Step 2: Extract questions using VLM
-            status_text.text("🔍 Extracting questions using VLM...")
-            progress_bar.progress(25)
-
-            extracted_questions = extract_questions_from_images(images)
-            questions_json = questions_to_json(extracted_questions)
-
-            st.success(f"✅ Extracted {len(extracted_questions)} questions")
-
-            if save_intermediate:
-                save_json_backup(questions_json, "extracted_questions.json")
-
-            # Step 3: Process knowledge base
+            # Step 2: Resolve the knowledge base so it can be prepared alongside the VLM
             if kb_file is None:
                 # Use default knowledge base
                 kb_path = "files/IndianMovie_KnowledgeBase.md"
@@ -142,35 +223,74 @@ def process_pipeline(uploaded_pdf, kb_file, status_container, force_recreate_db,
                 with open(kb_path, "wb") as f:
                     f.write(kb_file.getbuffer())
 
-            status_text.text("📚 Processing knowledge base...")
-            progress_bar.progress(40)
+            kb_hash = content_cache.content_hash(Path(kb_path).read_bytes())
 
-            chunks = process_knowledge_base(kb_path)
-            st.success(f"✅ Created {len(chunks)} knowledge chunks")
+            executor = ThreadPoolExecutor(max_workers=1)
+            # Step 3: Chunk, embed and store the knowledge base in the background
+            kb_future = executor.submit(
+                with_script_run_ctx(prepare_knowledge_base), kb_hash, kb_path, force_recreate_db
+            )
 
-            # Step 4: Setup vector store
-            status_text.text("🗄️ Setting up vector database...")
+            # Step 4: Extract questions using VLM
+            status_text.text("🔍 Extracting questions using VLM (knowledge base in background)...")
+            progress_bar.progress(25)
+
+            vlm_key = f"vlm:{pdf_hash}:{API_CONFIG.sambanova_model}"
+            questions_json = content_cache.get(vlm_key)
+            if questions_json is None:
+                extracted_questions = extract_questions_from_images(
+                    images,
+                    progress_callback=progress_range(25, 55, "🔍 Extracting questions using VLM")
+                )
+                questions_json = questions_to_json(extracted_questions)
+
+                # A page whose VLM calls all failed has no questions; pages that did
+                # succeed are cached per page, so only the missing ones are retried
+                pages_with_questions = {question.metadata["page_number"] for question in extracted_questions}
+                if all(page_number in pages_with_questions for page_number, _ in images):
+                    content_cache.put(vlm_key, questions_json)
+
+            st.success(f"✅ Extracted {questions_json['total_questions']} questions")
+
+            if save_intermediate:
+                save_json_backup(questions_json, "extracted_questions.json")
+
+            kb_message = "📚 Preparing knowledge base and vector database..."
+            status_text.text(kb_message)
             progress_bar.progress(55)
 
-            vector_store = setup_vector_store(chunks, force_recreate=force_recreate_db)
+            chunks, vector_store = wait_for_future(kb_future, status_text, kb_message)
+
+            st.success(f"✅ Created {len(chunks)} knowledge chunks")
             st.success("✅ Vector database ready")
 
             # Step 5: Answer questions using RAG
             status_text.text("🤖 Generating answers using RAG...")
             progress_bar.progress(70)
 
-            answered_questions = answer_all_questions(questions_json, vector_store)
+            # Cached answers are only valid for the knowledge base they came from
+            answered_questions = asyncio.run(
+                answer_all_questions_async(
+                    questions_json,
+                    vector_store,
+                    cache_namespace=kb_hash,
+                    progress_callback=progress_range(70, 85, "🤖 Generating answers using RAG"),
+                    rag_agent=get_rag_agent(vector_store, kb_hash, compute_kb_signature(chunks))
+                )
+            )
             st.success(f"✅ Generated answers for {len(answered_questions['questions'])} questions")
 
             if save_intermediate:
                 save_json_backup(answered_questions, "answered_questions.json")
 
             # Step 6: Generate PDF
-            status_text.text("📄 Generating answer PDF...")
+            pdf_message = "📄 Generating answer PDF..."
+            status_text.text(pdf_message)
             progress_bar.progress(85)
 
-            output_pdf_path = f"{Path(uploaded_pdf.name).stem}_Answers.pdf"
-            if generate_answer_pdf(answered_questions, output_pdf_path):
+            output_pdf_path = f"{Path(uploaded_pdf_name).stem}_Answers.pdf"
+            pdf_future = executor.submit(generate_answer_pdf, answered_questions, output_pdf_path)
+            if wait_for_future(pdf_future, status_text, pdf_message):
                 st.success(f"✅ Generated answer PDF: {output_pdf_path}")
             else:
                 st.error("❌ Failed to generate PDF")
@@ -181,15 +301,48 @@ def process_pipeline(uploaded_pdf, kb_file, status_container, force_recreate_db,
             progress_bar.progress(100)
 
             # Display results
+            answered_questions["processing_time_s"] = time.perf_counter() - start_time
+            st.session_state.question_preview = build_question_preview(answered_questions["questions"])
             display_results(answered_questions, output_pdf_path)
 
             # Cleanup
             if kb_file is not None and Path(kb_path).exists():
                 Path(kb_path).unlink()
 
+        except (StopException, RerunException):
+            # Cancel and reruns stop the script this way; they are not pipeline errors
+            raise
         except Exception as e:
             st.error(f"❌ Error during processing: {str(e)}")
-            logger.error(f"Pipeline error: {str(e)}", exc_info=True)
+            logger.error("Pipeline error: %s", e, exc_info=True)
+        finally:
+            # Don't wait for a task a cancelled run left behind
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+def build_question_preview(questions, limit=5):
+    """
+    Precompute the preview entries so rendering does no slicing or formatting.
+
+    Args:
+        questions: Answered questions
+        limit: Number of questions to preview
+
+    Returns:
+        List of preview entries ready to render
+    """
+    return [
+        {
+            "title": f"Question {i+1}: {question['question_text'][:100]}...",
+            "question_type": question['question_type'],
+            "labelled_options": [
+                f"  {chr(65+j)}. {option}" for j, option in enumerate(question.get('options') or [])
+            ],
+            "answer": question.get('answer', 'No answer'),
+            "page_number": question['metadata'].get('page_number', 'Unknown') if question.get('metadata') else None
+        }
+        for i, question in enumerate(questions[:limit])
+    ]
 
 def display_results(answered_questions, output_pdf_path):
     """Display processing results."""
@@ -205,8 +358,7 @@ def display_results(answered_questions, output_pdf_path):
         st.metric("Answered Questions", answered_questions.get("answered_questions", 0))
 
     with col3:
-        processing_time = time.time() - answered_questions.get("extraction_timestamp", time.time())
-        st.metric("Processing Time", f"{processing_time:.1f}s")
+        st.metric("Processing Time", f"{answered_questions['processing_time_s']:.1f}s")
 
     # Download buttons with session state to prevent refresh
     st.subheader("📥 Download Results")
@@ -215,18 +367,12 @@ def display_results(answered_questions, output_pdf_path):
     if 'download_ready' not in st.session_state:
         st.session_state.download_ready = False
 
-    # Store data in session state to prevent refresh issues
-    if Path(output_pdf_path).exists():
-        with open(output_pdf_path, "rb") as pdf_file:
-            pdf_data = pdf_file.read()
-
-        # Store in session state
-        st.session_state.pdf_data = pdf_data
-        st.session_state.pdf_filename = output_pdf_path
+    # Only the path is kept in session state; the PDF itself is streamed from disk
+    pdf_ready = Path(output_pdf_path).exists()
+    st.session_state.pdf_filename = output_pdf_path
 
-    # Store JSON data
-    json_str = json.dumps(answered_questions, indent=2)
-    st.session_state.json_data = json_str
+    # Store JSON data, encoded once
+    st.session_state.json_data = orjson.dumps(answered_questions, option=orjson.OPT_INDENT_2)
     st.session_state.json_filename = f"{Path(output_pdf_path).stem}.json"
 
     st.session_state.download_ready = True
@@ -237,16 +383,17 @@ def display_results(answered_questions, output_pdf_path):
     current_timestamp = int(time.time() * 1000)  # milliseconds for uniqueness
 
     with col1:
-        if st.session_state.download_ready and hasattr(st.session_state, 'pdf_data'):
-            st.download_button(
-                label="📄 Download Answer PDF",
-                data=st.session_state.pdf_data,
-                file_name=st.session_state.pdf_filename,
-                mime="application/pdf",
-                key=f"pdf_download_{current_timestamp}",
-                help="Click to download the answer PDF",
-                use_container_width=True
-            )
+        if st.session_state.download_ready and pdf_ready:
+            with open(st.session_state.pdf_filename, "rb") as pdf_file:
+                st.download_button(
+                    label="📄 Download Answer PDF",
+                    data=pdf_file,
+                    file_name=st.session_state.pdf_filename,
+                    mime="application/pdf",
+                    key=f"pdf_download_{current_timestamp}",
+                    help="Click to download the answer PDF",
+                    use_container_width=True
+                )
 
     with col2:
         if st.session_state.download_ready and hasattr(st.session_state, 'json_data'):
@@ -263,19 +410,19 @@ def display_results(answered_questions, output_pdf_path):
     # Preview questions and answers
     st.subheader("👀 Preview Questions & Answers")
 
-    for i, question in enumerate(answered_questions["questions"][:5]):  # Show first 5
-        with st.expander(f"Question {i+1}: {question['question_text'][:100]}..."):
-            st.write(f"**Type:** {question['question_type']}")
+    for preview in st.session_state.question_preview:  # Show first 5
+        with st.expander(preview["title"]):
+            st.write(f"**Type:** {preview['question_type']}")
 
-            if question.get('options'):
+            if preview["labelled_options"]:
                 st.write("**Options:**")
-                for j, option in enumerate(question['options']):
-                    st.write(f"  {chr(65+j)}. {option}")
+                for option in preview["labelled_options"]:
+                    st.write(option)
 
-            st.write(f"**Answer:** {question.get('answer', 'No answer')}")
+            st.write(f"**Answer:** {preview['answer']}")
 
-            if question.get('metadata'):
-                st.write(f"**Source Page:** {question['metadata'].get('page_number', 'Unknown')}")
+            if preview["page_number"] is not None:
+                st.write(f"**Source Page:** {preview['page_number']}")
 
     if len(answered_questions["questions"]) > 5:
         st.info(f"Showing first 5 questions. Total: {len(answered_questions['questions'])}")
@@ -2,8 +2,11 @@
 Configuration settings for the PDF Question Extraction and RAG system.
 """
 import os
+import functools
+import logging
 from typing import Dict, Any
 from dataclasses import dataclass
+from enum import Enum
 
 # Load environment variables from .env file for local development
 try:
@@ -20,6 +23,7 @@ try:
 except ImportError:
     HAS_STREAMLIT = False
 
+@functools.lru_cache(maxsize=None)
 def get_env_var(key: str, default: str = "") -> str:
     """Get environment variable with Streamlit secrets fallback."""
     # First try environment variables
@@ -34,80 +38,157 @@ def get_env_var(key: str, default: str = "") -> str:
 
     return value or default
 
-@dataclass
+@dataclass(frozen=True)
 class APIConfig:
     """API configuration settings loaded from environment variables or Streamlit secrets."""
-    sambanova_api_key: str = get_env_var("SAMBANOVA_API_KEY")
-    sambanova_base_url: str = get_env_var("SAMBANOVA_BASE_URL", "https://api.sambanova.ai/v1")
-    sambanova_model: str = get_env_var("SAMBANOVA_MODEL", "Llama-4-Maverick-17B-128E-Instruct")
-
-    mistral_api_key: str = get_env_var("MISTRAL_API_KEY")
-    mistral_model: str = get_env_var("MISTRAL_MODEL", "mistral-large-latest")
-
-    qdrant_url: str = get_env_var("QDRANT_URL")
-    qdrant_api_key: str = get_env_var("QDRANT_API_KEY")
-
-    cohere_api_key: str = get_env_var("COHERE_API_KEY")
-    cohere_embed_model: str = get_env_var("COHERE_EMBED_MODEL", "embed-v4.0")
-    cohere_rerank_model: str = get_env_var("COHERE_RERANK_MODEL", "rerank-v3.5")
-
-@dataclass
+    sambanova_api_key: str = ""
+    sambanova_base_url: str = "https://api.sambanova.ai/v1"
+    sambanova_model: str = "Llama-4-Maverick-17B-128E-Instruct"
+
+    mistral_api_key: str = ""
+    mistral_model: str = "mistral-large-latest"
+
+    qdrant_url: str = ""
+    qdrant_api_key: str = ""
+
+    cohere_api_key: str = ""
+    cohere_embed_model: str = "embed-v4.0"
+    cohere_rerank_model: str = "rerank-v3.5"
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _load(cls) -> "APIConfig":
+        """Read the settings once and return the shared instance."""
+        return cls(
+            sambanova_api_key=get_env_var("SAMBANOVA_API_KEY"),
+            sambanova_base_url=get_env_var("SAMBANOVA_BASE_URL", cls.sambanova_base_url),
+            sambanova_model=get_env_var("SAMBANOVA_MODEL", cls.sambanova_model),
+            mistral_api_key=get_env_var("MISTRAL_API_KEY"),
+            mistral_model=get_env_var("MISTRAL_MODEL", cls.mistral_model),
+            qdrant_url=get_env_var("QDRANT_URL"),
+            qdrant_api_key=get_env_var("QDRANT_API_KEY"),
+            cohere_api_key=get_env_var("COHERE_API_KEY"),
+            cohere_embed_model=get_env_var("COHERE_EMBED_MODEL", cls.cohere_embed_model),
+            cohere_rerank_model=get_env_var("COHERE_RERANK_MODEL", cls.cohere_rerank_model),
+        )
+
+@dataclass(frozen=True)
 class ProcessingConfig:
     """Processing configuration settings."""
     # PDF processing
-    pdf_dpi: int = 300
+    pdf_dpi_display: int = 300  # Print-quality rendering
+    pdf_dpi_vlm: int = 150  # Enough for the VLM to read the text
     image_format: str = "PNG"
+    vlm_image_format: str = "JPEG"
+    jpeg_quality: int = 85
+    pdf_render_workers: int = 0  # Render processes, 0 uses one per CPU core
+    skip_blank_pages: bool = True  # Leave pages with no text, images or drawings out of VLM extraction
 
     # VLM processing
     vlm_temperature: float = 0.1
     vlm_top_p: float = 0.1
     max_retries: int = 3
+    retry_backoff_base: float = 1.0  # Shortest wait before retrying a VLM call, in seconds
+    retry_backoff_cap: float = 60.0  # Longest wait before retrying a VLM call, in seconds
+    vlm_batch_size: int = 8  # Pages sent to the VLM concurrently
+    vlm_requests_per_minute: int = 60  # SambaNova request quota, 0 for no limit
 
     # Embedding model (now using Cohere)
     embedding_model: str = "cohere"  # Changed to use Cohere
     embedding_dimension: int = 1536  # Cohere embed-v4.0 dimension
+    embedding_batch_size: int = 96  # Cohere's per-request text limit
+    embedding_max_in_flight: int = 8  # Concurrent embed requests
+    embedding_cache_enabled: bool = True
+    embedding_cache_path: str = ".cache/embeddings.sqlite"
 
     # Chunking
-    chunk_size: int = 1000
-    chunk_overlap: int = 200
+    chunk_size: int = 256  # Maximum chunk length in tokens
+    chunk_overlap: int = 64  # Tokens of trailing lines or paragraphs repeated in the next chunk
+    semantic_chunking: bool = True  # Split general content where adjacent-sentence similarity drops
+    semantic_chunk_threshold: float = 0.5  # Cosine similarity below which a new chunk starts
 
     # Vector store
     collection_name: str = "knowledge_base"
     similarity_threshold: float = 0.3  # Lowered from 0.7 to allow more relevant results
     top_k_results: int = 10  # Increased for reranking
+    upsert_batch_size: int = 1000  # Points per Qdrant upsert request
+    qdrant_prefer_grpc: bool = True  # Talk to Qdrant over gRPC (port 6334) instead of REST
+    upsert_parallel: int = 1  # Upload worker processes; more only pays off for very large knowledge bases
+    vector_quantization: bool = True  # Store an int8 (SQ8) copy of vectors in Qdrant for search
+    quantization_quantile: float = 0.99  # Quantile used to clip outliers when fitting the int8 range
+    quantization_rescore: bool = True  # Rescore quantized candidates against the float32 originals
+    quantization_oversampling: float = 2.0  # Quantized candidates fetched per result before rescoring
 
     # Reranking
     use_reranker: bool = True
     rerank_top_n: int = 5  # Final number after reranking
-
-@dataclass
-class QuestionTypes:
+    rerank_skip_threshold: float = 0.92  # Top search score above which the vector order is trusted as is
+    rerank_cache_ttl: int = 900  # Seconds a (query, chunk) rerank score is reused
+    rerank_cache_size: int = 50000  # Most (query, chunk) rerank scores kept
+
+    # RAG answering
+    rag_concurrency: int = 8  # Questions answered concurrently
+    llm_min_interval: float = 1.0  # Seconds between LLM calls (MistralAI 1 req/sec)
+    llm_temperature: float = 0.0  # Deterministic answers, so cached answers match fresh ones
+    retrieval_cache_size: int = 2048  # Reranked contexts kept per agent, 0 to disable
+    retrieval_cache_threshold: float = 0.98  # Cosine similarity for reusing another query's context
+
+    # Semantic answer cache
+    semantic_cache_enabled: bool = True
+    semantic_cache_threshold: float = 0.95  # Cosine similarity for a cache hit
+    semantic_cache_ttl: float = 7 * 24 * 3600  # Seconds before cached answers expire
+    semantic_cache_path: str = ".cache/semantic_cache.sqlite"
+    semantic_cache_size: int = 4096  # Newest answers kept in memory for similarity lookups
+
+    # Content-hash cache for PDF pages, extracted questions and chunks
+    content_cache_dir: str = ".cache/ipdf"
+    content_cache_ttl: float = 7 * 24 * 3600  # Seconds before entries expire
+
+    # Logging
+    debug: bool = False  # Log pipeline progress at INFO level
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _load(cls) -> "ProcessingConfig":
+        """Return the shared instance."""
+        return cls(debug=get_env_var("DEBUG").lower() in ("1", "true", "yes"))
+
+class QuestionType(str, Enum):
     """Supported question types."""
-    MULTIPLE_CHOICE_SINGLE: str = "multiple_choice_single"
-    MULTIPLE_CHOICE_MULTI: str = "multiple_choice_multi"
-    FILL_IN_BLANK: str = "fill_in_blank"
-    TRUE_FALSE: str = "true_false"
-    MATCH_FOLLOWING: str = "match_following"
-    TEXTUAL_ANSWER: str = "textual_answer"
-    CHECKBOX: str = "checkbox"  # New checkbox question type
-    TABLE_COMPLETION: str = "table_completion"  # New table question type
+    MULTIPLE_CHOICE_SINGLE = "multiple_choice_single"
+    MULTIPLE_CHOICE_MULTI = "multiple_choice_multi"
+    FILL_IN_BLANK = "fill_in_blank"
+    TRUE_FALSE = "true_false"
+    MATCH_FOLLOWING = "match_following"
+    TEXTUAL_ANSWER = "textual_answer"
+    CHECKBOX = "checkbox"  # New checkbox question type
+    TABLE_COMPLETION = "table_completion"  # New table question type
 
     # New question types
-    NUMERICAL_ANSWER: str = "numerical_answer"
-    DATE_TIME: str = "date_time"
-    ORDERING_SEQUENCE: str = "ordering_sequence"
-    CATEGORIZATION: str = "categorization"
-    COMPARISON: str = "comparison"
-    CAUSE_EFFECT: str = "cause_effect"
-    DEFINITION: str = "definition"
-    EXPLANATION: str = "explanation"
-    ANALYSIS: str = "analysis"
-    EVALUATION: str = "evaluation"
+    NUMERICAL_ANSWER = "numerical_answer"
+    DATE_TIME = "date_time"
+    ORDERING_SEQUENCE = "ordering_sequence"
+    CATEGORIZATION = "categorization"
+    COMPARISON = "comparison"
+    CAUSE_EFFECT = "cause_effect"
+    DEFINITION = "definition"
+    EXPLANATION = "explanation"
+    ANALYSIS = "analysis"
+    EVALUATION = "evaluation"
+
+    def __str__(self) -> str:
+        # Format as the plain value, like enum.StrEnum (Python 3.11+)
+        return self.value
 
 # Global configuration instances
-API_CONFIG = APIConfig()
-PROCESSING_CONFIG = ProcessingConfig()
-QUESTION_TYPES = QuestionTypes()
+API_CONFIG = APIConfig._load()
+PROCESSING_CONFIG = ProcessingConfig._load()
+
+def configure_logging():
+    """Configure root logging, WARNING by default or LOG_LEVEL when set."""
+    logging.basicConfig(level=get_env_var("LOG_LEVEL", "WARNING").upper())
+    if PROCESSING_CONFIG.debug:
+        logging.getLogger().setLevel(logging.INFO)
 
 # VLM Prompt Templates
 VLM_SYSTEM_PROMPT = """
@@ -1,25 +1,35 @@
 """
 Enhanced demo script showcasing the improved PDF Question Extraction and RAG system.
 """
+import argparse
 import json
 import logging
+from collections import Counter
 from pathlib import Path
 
+import numpy as np
+
+from config import configure_logging
+
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+# Print per-item details in demo loops (set with --verbose)
+VERBOSE = False
+
 def demo_cohere_embeddings():
     """Demo Cohere embeddings integration."""
     print("🧪 Demo: Cohere Embeddings Integration")
     print("=" * 50)
 
     try:
-        import cohere
         from config import API_CONFIG
+        from services.cohere_client import get_cohere_client
+        from services.knowledge_processor import embed_batched
 
         # Test Cohere client
-        client = cohere.ClientV2(api_key=API_CONFIG.cohere_api_key)
+        client = get_cohere_client()
 
         # Test embedding generation
         test_texts = [
@@ -28,17 +38,12 @@ def demo_cohere_embeddings():
         ]
 
         print("📊 Testing Cohere embeddings...")
-        response = client.embed(
-            texts=test_texts,
-            model=API_CONFIG.cohere_embed_model,
-            input_type="search_document",
-            embedding_types=["float"]
-        )
+        embeddings = embed_batched(client, test_texts)
 
         print(f"✅ Generated embeddings for {len(test_texts)} texts")
 
         # Extract embedding dimension from Cohere response
-        embedding_dim = len(response.embeddings.float_[0])
+        embedding_dim = len(embeddings[0])
 
         print(f"   Embedding dimension: {embedding_dim}")
         print(f"   Model: {API_CONFIG.cohere_embed_model}")
@@ -55,10 +60,10 @@ def demo_cohere_reranking():
     print("=" * 50)
 
     try:
-        import cohere
         from config import API_CONFIG
+        from services.cohere_client import get_cohere_client
 
-        client = cohere.ClientV2(api_key=API_CONFIG.cohere_api_key)
+        client = get_cohere_client()
 
         # Test documents
         docs = [
@@ -81,10 +86,11 @@ def demo_cohere_reranking():
             top_n=3
         )
 
-        print("✅ Reranking results:")
-        for i, result in enumerate(response.results):
-            print(f"   {i+1}. Score: {result.relevance_score:.3f}")
-            print(f"      Text: {docs[result.index][:100]}...")
+        print(f"✅ Reranked to {len(response.results)} results")
+        if VERBOSE:
+            for i, result in enumerate(response.results):
+                print(f"   {i+1}. Score: {result.relevance_score:.3f}")
+                print(f"      Text: {docs[result.index][:100]}...")
 
         return True
 
@@ -116,26 +122,33 @@ def demo_advanced_chunking():
         print(f"✅ Created {len(chunks)} advanced chunks")
 
         # Analyze chunk types
-        chunk_types = {}
-        for chunk in chunks:
-            chunk_type = chunk.get('chunk_type', 'unknown')
-            chunk_types[chunk_type] = chunk_types.get(chunk_type, 0) + 1
+        chunk_types = Counter(chunk.get('chunk_type', 'unknown') for chunk in chunks)
 
         print("📊 Chunk type distribution:")
-        for chunk_type, count in chunk_types.items():
+        for chunk_type, count in chunk_types.most_common():
             print(f"   {chunk_type}: {count}")
 
+        if chunks:
+            scores = np.fromiter(
+                (chunk.get('metadata', {}).get('importance_score', 0.0) for chunk in chunks),
+                dtype=np.float32,
+                count=len(chunks)
+            )
+            p50, p90, p99 = np.percentile(scores, [50, 90, 99])
+            print(f"📈 Importance: mean {scores.mean():.2f}, p50 {p50:.2f}, p90 {p90:.2f}, p99 {p99:.2f}")
+
         # Show sample chunks
-        print("\n📋 Sample chunks:")
-        for i, chunk in enumerate(chunks[:3]):
-            print(f"   Chunk {i+1}:")
-            print(f"     Type: {chunk.get('chunk_type', 'unknown')}")
-            print(f"     Section: {chunk['section']}")
-            print(f"     Entities: {len(chunk.get('entity_mentions', []))}")
-            print(f"     Keywords: {len(chunk.get('keywords', []))}")
-            print(f"     Importance: {chunk.get('metadata', {}).get('importance_score', 0):.2f}")
-            print(f"     Text: {chunk['text'][:150]}...")
-            print()
+        if VERBOSE:
+            print("\n📋 Sample chunks:")
+            for i, chunk in enumerate(chunks[:3]):
+                print(f"   Chunk {i+1}:")
+                print(f"     Type: {chunk.get('chunk_type', 'unknown')}")
+                print(f"     Section: {chunk['section']}")
+                print(f"     Entities: {len(chunk.get('entity_mentions', []))}")
+                print(f"     Keywords: {len(chunk.get('keywords', []))}")
+                print(f"     Importance: {chunk.get('metadata', {}).get('importance_score', 0):.2f}")
+                print(f"     Text: {chunk['text'][:150]}...")
+                print()
 
         return True
 
@@ -149,7 +162,7 @@ def demo_enhanced_question_types():
     print("=" * 50)
 
     try:
-        from config import QUESTION_TYPES
+        from config import QuestionType
         from services.rag_agent import RAGAgent
         from services.knowledge_processor import process_knowledge_base
         from services.vector_store import setup_vector_store
@@ -159,21 +172,21 @@ def demo_enhanced_question_types():
             {
                 "question_id": "demo_numerical",
                 "question_text": "In which year was Lagaan released?",
-                "question_type": QUESTION_TYPES.DATE_TIME,
+                "question_type": QuestionType.DATE_TIME,
                 "options": None,
                 "metadata": {"page_number": 1}
             },
             {
                 "question_id": "demo_comparison",
                 "question_text": "Compare the themes of Lagaan and 3 Idiots.",
-                "question_type": QUESTION_TYPES.COMPARISON,
+                "question_type": QuestionType.COMPARISON,
                 "options": None,
                 "metadata": {"page_number": 1}
             },
             {
                 "question_id": "demo_analysis",
                 "question_text": "Analyze the impact of Bollywood on Indian culture in the 2000s.",
-                "question_type": QUESTION_TYPES.ANALYSIS,
+                "question_type": QuestionType.ANALYSIS,
                 "options": None,
                 "metadata": {"page_number": 1}
             }
@@ -189,7 +202,7 @@ def demo_enhanced_question_types():
 
         print("📚 Setting up enhanced RAG system...")
         chunks = process_knowledge_base(kb_path)
-        vector_store = setup_vector_store(chunks, force_recreate=True)
+        vector_store = setup_vector_store(chunks, force_recreate=False)
         rag_agent = RAGAgent(vector_store)
 
         print("🤖 Answering enhanced questions...")
@@ -259,7 +272,7 @@ def demo_full_pipeline():
         chunks = process_knowledge_base(kb_path)
 
         print("🗄️ Setting up vector store with Cohere embeddings...")
-        vector_store = setup_vector_store(chunks, force_recreate=True)
+        vector_store = setup_vector_store(chunks, force_recreate=False)
 
         print("🤖 Answering questions with Cohere reranking...")
         answered_questions = answer_all_questions(sample_json, vector_store)
@@ -273,10 +286,11 @@ def demo_full_pipeline():
             print(f"   Output: {output_path}")
 
             # Show results
-            print("\n📊 Results Summary:")
-            for i, question in enumerate(answered_questions["questions"]):
-                print(f"   Question {i+1} ({question['question_type']}):")
-                print(f"     Answer: {question.get('answer', 'No answer')[:100]}...")
+            if VERBOSE:
+                print("\n📊 Results Summary:")
+                for i, question in enumerate(answered_questions["questions"]):
+                    print(f"   Question {i+1} ({question['question_type']}):")
+                    print(f"     Answer: {question.get('answer', 'No answer')[:100]}...")
 
             return True
         else:
@@ -289,6 +303,11 @@ def demo_full_pipeline():
 
 def main():
     """Run all enhanced demos."""
+    global VERBOSE
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--verbose", action="store_true", help="Print per-item demo output")
+    VERBOSE = parser.parse_args().verbose
+
     print("🚀 Enhanced PDF Question Extraction and RAG System - Demo")
     print("=" * 60)
 
@@ -1,8 +1,6 @@
 """
 Simple script to run the Streamlit application with proper configuration.
 """
-import subprocess
-import sys
 import os
 from pathlib import Path
 
@@ -35,13 +33,16 @@ def run_streamlit():
         print("Press Ctrl+C to stop the application")
         print("="*60 + "\n")
         
-        # Run streamlit
-        subprocess.run([
-            sys.executable, "-m", "streamlit", "run", "app.py",
-            "--server.port", "8501",
-            "--server.address", "localhost",
-            "--browser.gatherUsageStats", "false"
-        ])
+        # Run streamlit in this process rather than a child interpreter
+        from streamlit.web import bootstrap
+
+        flag_options = {
+            "server.port": 8501,
+            "server.address": "localhost",
+            "browser.gatherUsageStats": False
+        }
+        bootstrap.load_config_options(flag_options=flag_options)
+        bootstrap.run("app.py", False, [], flag_options)
         
     except KeyboardInterrupt:
         print("\n\n👋 Application stopped by user")
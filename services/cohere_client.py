@@ -0,0 +1,28 @@
+"""
+Shared Cohere client with a persistent HTTP connection pool.
+"""
+import functools
+
+import cohere
+import httpx
+
+from config import API_CONFIG
+
+@functools.lru_cache(maxsize=1)
+def get_cohere_client() -> cohere.ClientV2:
+    """
+    Get the process-wide Cohere client.
+
+    Reusing one client keeps TLS connections alive between embed and
+    rerank calls instead of opening a new pool per caller.
+
+    Returns:
+        Shared Cohere client
+    """
+    return cohere.ClientV2(
+        api_key=API_CONFIG.cohere_api_key,
+        httpx_client=httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+        )
+    )
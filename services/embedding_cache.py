@@ -0,0 +1,88 @@
+"""
+Persistent cache of document embeddings keyed by text content.
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Dict, Sequence
+
+import numpy as np
+
+from config import API_CONFIG, PROCESSING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """Stores chunk embeddings so unchanged text is never re-embedded."""
+
+    def __init__(self, db_path: str = None, model: str = None):
+        """
+        Initialize embedding cache.
+
+        Args:
+            db_path: Path of the SQLite database backing the cache
+            model: Embedding model the cached vectors belong to
+        """
+        self.db_path = db_path or PROCESSING_CONFIG.embedding_cache_path
+        self.model = model or API_CONFIG.cohere_embed_model
+
+        self._lock = threading.Lock()
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, embedding BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def key(self, text: str) -> bytes:
+        """Build the cache key for a text under this cache's model."""
+        return hashlib.sha256((self.model + "\x00" + text).encode("utf-8")).digest()
+
+    def get_many(self, texts: List[str]) -> Dict[int, np.ndarray]:
+        """
+        Look up cached embeddings.
+
+        Args:
+            texts: Texts to look up
+
+        Returns:
+            Mapping of index in ``texts`` to embedding, for cache hits only
+        """
+        keys = [self.key(text) for text in texts]
+        found: Dict[bytes, np.ndarray] = {}
+
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT key, embedding FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+            for key, embedding in rows:
+                found[key] = np.frombuffer(embedding, dtype=np.float32)
+
+        return {i: found[key] for i, key in enumerate(keys) if key in found}
+
+    def put_many(self, texts: List[str], embeddings: Sequence[Sequence[float]]):
+        """
+        Store embeddings.
+
+        Args:
+            texts: Embedded texts
+            embeddings: Embeddings in the same order as ``texts``
+        """
+        rows = [
+            (self.key(text), np.asarray(embedding, dtype=np.float32).tobytes())
+            for text, embedding in zip(texts, embeddings)
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?)", rows)
+            self._conn.commit()
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
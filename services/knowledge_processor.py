@@ -1,18 +1,172 @@
 """
 Knowledge base processing and chunking service with advanced chunking strategies.
 """
+import asyncio
+import functools
 import logging
-from typing import List, Dict, Any, Tuple
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, islice
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, TYPE_CHECKING
 from pathlib import Path
 import re
-import cohere
-import numpy as np
 from collections import defaultdict
 
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
 from config import PROCESSING_CONFIG, API_CONFIG
 
+# cohere and numpy are imported where they are used so importing this module stays cheap
+if TYPE_CHECKING:
+    import cohere
+    import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# Patterns used while parsing and chunking, compiled once
+_HEADER_RE = re.compile(r'^(#{1,6})\s+(.+)$')
+_FILM_RE = re.compile(r'\*\*\d+\.\s+([^*]+)\*\*')
+_PERSON_RE = re.compile(r'\*\s+\*\*([^*]+):\*\*')
+_FILM_TITLE_RE = re.compile(r'\*([^*]+)\*|"([^"]+)"')
+_YEAR_RE = re.compile(r'\b(19|20)\d{2}\b')
+_NAME_RE = re.compile(r'\b[A-Z][a-z]+ [A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b')
+_FILM_INFO_RE = re.compile(r'director:|music:|plot:|actors:|themes:', re.IGNORECASE)
+_PERSON_INFO_RE = re.compile(r'signature:|evolution:|impact:|notable roles:', re.IGNORECASE)
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+# Importance markers: group 1 matches in any case, group 2 only as written
+_IMPORTANCE_RE = re.compile(
+    r'(?i:(significance:|impact:|notable:|important:))|(Director:|Music:|Plot:|Actors:)'
+)
+
+# Domain-specific keywords for Indian cinema
+_CINEMA_KEYWORDS = [
+    'director', 'actor', 'actress', 'film', 'movie', 'bollywood', 'cinema',
+    'box office', 'award', 'music', 'song', 'dance', 'romance', 'comedy',
+    'drama', 'action', 'thriller', 'performance', 'debut', 'success',
+    'commercial', 'critical', 'blockbuster', 'hit', 'flop'
+]
+
+# Single-pass keyword matcher: an Aho-Corasick automaton when pyahocorasick is
+# installed, otherwise a regex whose lookahead also reports overlapping matches
+_KEYWORD_RE = re.compile('(?=(' + '|'.join(re.escape(keyword) for keyword in _CINEMA_KEYWORDS) + '))')
+if HAS_AHOCORASICK:
+    _KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _keyword in _CINEMA_KEYWORDS:
+        _KEYWORD_AUTOMATON.add_word(_keyword, _keyword)
+    _KEYWORD_AUTOMATON.make_automaton()
+else:
+    _KEYWORD_AUTOMATON = None
+
+def _occurs_more_than(text: str, char: str, limit: int) -> bool:
+    """Check whether ``char`` occurs more than ``limit`` times, stopping early."""
+    index = -1
+    for _ in range(limit + 1):
+        index = text.find(char, index + 1)
+        if index == -1:
+            return False
+    return True
+
+def _join_sentences(units: List[Tuple[int, str]]) -> str:
+    """Join (paragraph index, sentence) pairs, separating paragraphs with a blank line."""
+    parts = []
+    previous = None
+    for index, sentence in units:
+        if previous is not None:
+            parts.append(' ' if index == previous else '\n\n')
+        parts.append(sentence)
+        previous = index
+    return ''.join(parts)
+
+@functools.lru_cache(maxsize=1)
+def _get_token_encoding():
+    """Load the tokenizer used for chunk sizes, or None if tiktoken is unavailable."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable, estimating chunk sizes from characters: {str(e)}")
+        return None
+
+@functools.lru_cache(maxsize=65536)
+def _count_tokens(text: str) -> int:
+    """Count the tokens in ``text``, assuming four characters per token without tiktoken."""
+    encoding = _get_token_encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+def _pack_by_size(sizes: List[int], limit: int, overlap: int = 0) -> Iterator[Tuple[int, int]]:
+    """
+    Greedily pack consecutive items into ranges whose total size fits ``limit``.
+
+    Boundaries are found by binary search over prefix sums rather than by
+    adding up sizes item by item. A range always holds at least one item,
+    even one larger than ``limit``. Each range after the first repeats the
+    trailing items of the previous one that fit in ``overlap``, as long as
+    it still reaches past the end of the previous range.
+
+    Args:
+        sizes: Size of each item
+        limit: Maximum total size of a range
+        overlap: Maximum total size of the items repeated from the previous range
+
+    Yields:
+        (start, end) index ranges covering all items in order
+    """
+    offsets = [0, *accumulate(sizes)]
+    start = 0
+    while start < len(sizes):
+        end = max(start + 1, bisect_right(offsets, offsets[start] + limit, lo=start) - 1)
+        yield start, end
+        if end == len(sizes):
+            break
+
+        # Earliest item after start whose run to the end of this range fits in overlap
+        next_start = bisect_left(offsets, offsets[end] - overlap, lo=start + 1, hi=end)
+        start = next_start if offsets[end + 1] - offsets[next_start] <= limit else end
+
+def _iter_batches(texts: Iterable[str], batch_size: int) -> Iterator[List[str]]:
+    """Yield consecutive batches of at most ``batch_size`` texts."""
+    iterator = iter(texts)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+def embed_batched(
+    client: "cohere.ClientV2",
+    texts: List[str],
+    batch_size: int = None,
+    input_type: str = "search_document"
+) -> List[List[float]]:
+    """
+    Embed texts with one Cohere request per batch instead of one per text.
+
+    Args:
+        client: Cohere client to use
+        texts: Texts to embed
+        batch_size: Maximum texts per request
+        input_type: Cohere input type
+
+    Returns:
+        Embeddings in the same order as ``texts``
+    """
+    batch_size = batch_size or PROCESSING_CONFIG.embedding_batch_size
+    embeddings = []
+
+    for batch in _iter_batches(texts, batch_size):
+        response = client.embed(
+            texts=batch,
+            model=API_CONFIG.cohere_embed_model,
+            input_type=input_type,
+            embedding_types=["float"],
+            truncate="END"
+        )
+        embeddings.extend(response.embeddings.float_)
+
+    return embeddings
+
 class KnowledgeProcessor:
     """Processes and chunks knowledge base documents with advanced strategies."""
 
@@ -28,8 +182,13 @@ class KnowledgeProcessor:
         self.chunk_overlap = PROCESSING_CONFIG.chunk_overlap
 
         # Initialize Cohere client for embeddings
+        from services.cohere_client import get_cohere_client
+
         logger.info(f"Initializing Cohere client for embeddings")
-        self.cohere_client = cohere.ClientV2(api_key=API_CONFIG.cohere_api_key)
+        self.cohere_client = get_cohere_client()
+
+        # Embeddings from the last generate_embeddings call, one row per chunk
+        self.embedding_matrix: Optional["np.ndarray"] = None
 
     def load_knowledge_base(self, file_path: str) -> str:
         """
@@ -52,6 +211,28 @@ class KnowledgeProcessor:
             logger.error(f"Error loading knowledge base from {file_path}: {str(e)}")
             raise
 
+    def chunk_file_advanced(self, file_path: str) -> List[Dict[str, Any]]:
+        """
+        Chunk a knowledge base file while streaming it line by line.
+
+        Only the section being parsed is held as raw text, rather than the
+        whole file.
+
+        Args:
+            file_path: Path to the knowledge base file
+
+        Returns:
+            List of chunk dictionaries
+        """
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                logger.info(f"Streaming knowledge base from {file_path}")
+                return self._chunk_lines(line.rstrip('\n') for line in f)
+
+        except Exception as e:
+            logger.error(f"Error loading knowledge base from {file_path}: {str(e)}")
+            raise
+
     def chunk_text_advanced(self, text: str) -> List[Dict[str, Any]]:
         """
         Advanced chunking strategy with semantic awareness and context preservation.
@@ -62,17 +243,41 @@ class KnowledgeProcessor:
         Returns:
             List of chunk dictionaries
         """
-        # Step 1: Parse document structure
-        document_structure = self._parse_document_structure(text)
+        return self._chunk_lines(text.splitlines())
 
-        # Step 2: Create semantic chunks
-        chunks = []
-        chunk_id = 0
+    def _chunk_lines(self, lines: Iterable[str]) -> List[Dict[str, Any]]:
+        """Chunk a document given as lines without trailing newlines."""
+        # Step 1: Parse document structure, one section at a time
+        document_structure = self._parse_document_structure(lines)
+
+        # Step 2: Create semantic chunks. Sections split by topic wait until the
+        # sentences of every such section are embedded together
+        section_chunks = []
+        pending = []
 
         for section in document_structure:
-            section_chunks = self._create_semantic_chunks(section)
+            units = self._semantic_split_units(section)
+            if units is None:
+                section_chunks.append(self._create_semantic_chunks(section))
+            else:
+                pending.append((len(section_chunks), section, units))
+                section_chunks.append([])
+
+        if pending:
+            embeddings = self._embed_sentences([sentence for _, _, units in pending for _, sentence in units])
+            offset = 0
+            for position, section, units in pending:
+                section_embeddings = None
+                if embeddings is not None:
+                    section_embeddings = embeddings[offset:offset + len(units)]
+                offset += len(units)
+                section_chunks[position] = self._create_semantic_chunks(section, units, section_embeddings)
 
-            for chunk_data in section_chunks:
+        chunks = []
+        chunk_id = 0
+
+        for section_chunk_list in section_chunks:
+            for chunk_data in section_chunk_list:
                 if len(chunk_data["text"].strip()) > 50:  # Minimum chunk size
                     chunk = {
                         "chunk_id": chunk_id,
@@ -97,29 +302,31 @@ class KnowledgeProcessor:
         logger.info(f"Created {len(chunks)} advanced chunks from knowledge base")
         return chunks
 
-    def _parse_document_structure(self, text: str) -> List[Dict[str, Any]]:
-        """Parse document into structured sections with metadata."""
-        sections = []
+    def _parse_document_structure(self, lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """Parse document lines into structured sections with metadata, yielding each as it completes."""
         current_section = None
         current_subsection = None
         current_content = []
 
-        lines = text.split('\n')
-
         for line in lines:
+            # Only lines containing '#' can be headers; skip the strip and regex otherwise
+            if '#' not in line:
+                current_content.append(line)
+                continue
+
             # Check for headers
-            header_match = re.match(r'^(#{1,6})\s+(.+)$', line.strip())
+            header_match = _HEADER_RE.match(line.strip())
 
             if header_match:
                 # Save previous content
                 if current_section and current_content:
-                    sections.append({
+                    yield {
                         "section": current_section,
                         "subsection": current_subsection,
                         "content": '\n'.join(current_content),
                         "level": len(header_match.group(1)),
                         "title": header_match.group(2)
-                    })
+                    }
 
                 # Start new section
                 level = len(header_match.group(1))
@@ -137,18 +344,21 @@ class KnowledgeProcessor:
 
         # Add final section
         if current_section and current_content:
-            sections.append({
+            yield {
                 "section": current_section,
                 "subsection": current_subsection,
                 "content": '\n'.join(current_content),
                 "level": 1,
                 "title": current_section
-            })
-
-        return sections
-
-    def _create_semantic_chunks(self, section: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Create semantically aware chunks from a section."""
+            }
+
+    def _create_semantic_chunks(
+        self,
+        section: Dict[str, Any],
+        units: Optional[List[Tuple[int, str]]] = None,
+        embeddings: Optional["np.ndarray"] = None
+    ) -> List[Dict[str, Any]]:
+        """Create semantically aware chunks from a section, given its sentence embeddings if split by topic."""
         content = section["content"]
         section_title = section["section"]
         subsection_title = section.get("subsection", "")
@@ -174,7 +384,7 @@ class KnowledgeProcessor:
             chunks = self._chunk_list_content(content, section_title, subsection_title)
         else:
             # General content chunking
-            chunks = self._chunk_general_content(content, section_title, subsection_title)
+            chunks = self._chunk_general_content(content, section_title, subsection_title, units, embeddings)
 
         # Add metadata to all chunks
         for chunk in chunks:
@@ -187,152 +397,56 @@ class KnowledgeProcessor:
 
     def _extract_entities(self, text: str) -> List[str]:
         """Extract named entities from text."""
-        # Simple entity extraction for Indian cinema domain
-        entities = []
+        # Simple entity extraction for Indian cinema domain;
+        # a dict dedupes as we go while keeping first-seen order
+        entities = {}
 
         # Film titles (in italics or quotes)
-        film_pattern = r'\*([^*]+)\*|"([^"]+)"'
-        films = re.findall(film_pattern, text)
-        for film_tuple in films:
-            film = film_tuple[0] or film_tuple[1]
+        for match in _FILM_TITLE_RE.finditer(text):
+            film = match.group(1) or match.group(2)
             if film and len(film) > 2:
-                entities.append(f"FILM:{film}")
+                entities[f"FILM:{film}"] = None
 
         # Years
-        year_pattern = r'\b(19|20)\d{2}\b'
-        years = re.findall(year_pattern, text)
-        entities.extend([f"YEAR:{year}" for year in years])
+        for match in _YEAR_RE.finditer(text):
+            entities[f"YEAR:{match.group(0)}"] = None
 
-        # Names (capitalized words)
-        name_pattern = r'\b[A-Z][a-z]+ [A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b'
-        names = re.findall(name_pattern, text)
-        entities.extend([f"PERSON:{name}" for name in names[:10]])  # Limit to avoid noise
+        # Names (capitalized words), stop scanning after the first 10 to avoid noise
+        for name_count, match in enumerate(_NAME_RE.finditer(text), start=1):
+            entities[f"PERSON:{match.group(0)}"] = None
+            if name_count == 10:
+                break
 
-        return list(set(entities))
+        return list(entities)
 
     def _extract_keywords(self, text: str) -> List[str]:
         """Extract important keywords from text."""
-        # Domain-specific keywords for Indian cinema
-        cinema_keywords = [
-            'director', 'actor', 'actress', 'film', 'movie', 'bollywood', 'cinema',
-            'box office', 'award', 'music', 'song', 'dance', 'romance', 'comedy',
-            'drama', 'action', 'thriller', 'performance', 'debut', 'success',
-            'commercial', 'critical', 'blockbuster', 'hit', 'flop'
-        ]
-
-        keywords = []
+        # Find every keyword in one pass over the text
         text_lower = text.lower()
+        if _KEYWORD_AUTOMATON is not None:
+            found = {keyword for _, keyword in _KEYWORD_AUTOMATON.iter(text_lower)}
+        else:
+            found = {match.group(1) for match in _KEYWORD_RE.finditer(text_lower)}
 
-        for keyword in cinema_keywords:
-            if keyword in text_lower:
-                keywords.append(keyword)
-
-        return keywords
+        return [keyword for keyword in _CINEMA_KEYWORDS if keyword in found]
 
     def _classify_content_type(self, content: str) -> str:
         """Classify the type of content."""
-        content_lower = content.lower()
-
-        if any(indicator in content_lower for indicator in ['director:', 'music:', 'plot:', 'actors:', 'themes:']):
+        if _FILM_INFO_RE.search(content):
             return "film_info"
-        elif any(indicator in content_lower for indicator in ['signature:', 'evolution:', 'impact:', 'notable roles:']):
+        elif _PERSON_INFO_RE.search(content):
             return "person_info"
-        elif content.count('*') > 5 or content.count('-') > 5:
+        elif _occurs_more_than(content, '*', 5) or _occurs_more_than(content, '-', 5):
             return "list"
         else:
             return "general"
 
-    def _split_by_headers(self, text: str) -> List[tuple]:
-        """Split text by markdown headers."""
-        # Pattern to match markdown headers
-        header_pattern = r'^(#{1,6})\s+(.+)$'
-
-        sections = []
-        current_section = ""
-        current_title = "Introduction"
-
-        lines = text.split('\n')
-
-        for line in lines:
-            header_match = re.match(header_pattern, line, re.MULTILINE)
-
-            if header_match:
-                # Save previous section
-                if current_section.strip():
-                    sections.append((current_title, current_section.strip()))
-
-                # Start new section
-                current_title = header_match.group(2).strip()
-                current_section = line + '\n'
-            else:
-                current_section += line + '\n'
-
-        # Add final section
-        if current_section.strip():
-            sections.append((current_title, current_section.strip()))
-
-        return sections
-
-    def _split_section(self, text: str, section_title: str) -> List[str]:
-        """Split a section into smaller chunks."""
-        if len(text) <= self.chunk_size:
-            return [text]
-
-        # Split by paragraphs first
-        paragraphs = text.split('\n\n')
-
-        chunks = []
-        current_chunk = ""
-
-        for paragraph in paragraphs:
-            # If adding this paragraph would exceed chunk size
-            if len(current_chunk) + len(paragraph) > self.chunk_size and current_chunk:
-                # Add overlap from previous chunk
-                if chunks:
-                    overlap_text = self._get_overlap_text(chunks[-1])
-                    current_chunk = overlap_text + current_chunk
-
-                chunks.append(current_chunk.strip())
-                current_chunk = paragraph
-            else:
-                if current_chunk:
-                    current_chunk += '\n\n' + paragraph
-                else:
-                    current_chunk = paragraph
-
-        # Add final chunk
-        if current_chunk.strip():
-            chunks.append(current_chunk.strip())
-
-        return chunks
-
-    def _get_overlap_text(self, previous_chunk: str) -> str:
-        """Get overlap text from previous chunk."""
-        if len(previous_chunk) <= self.chunk_overlap:
-            return previous_chunk + '\n\n'
-
-        # Take last chunk_overlap characters, but try to break at sentence boundary
-        overlap_text = previous_chunk[-self.chunk_overlap:]
-
-        # Find last sentence boundary
-        sentence_end = max(
-            overlap_text.rfind('.'),
-            overlap_text.rfind('!'),
-            overlap_text.rfind('?')
-        )
-
-        if sentence_end > self.chunk_overlap // 2:
-            overlap_text = overlap_text[sentence_end + 1:]
-
-        return overlap_text.strip() + '\n\n'
-
     def _chunk_film_info(self, content: str, section: str, subsection: str) -> List[Dict[str, Any]]:
         """Chunk film information content."""
         chunks = []
 
         # Split by film entries (marked by **Film Title**)
-        film_pattern = r'\*\*\d+\.\s+([^*]+)\*\*'
-        film_matches = list(re.finditer(film_pattern, content))
+        film_matches = list(_FILM_RE.finditer(content))
 
         for i, match in enumerate(film_matches):
             start_pos = match.start()
@@ -356,8 +470,7 @@ class KnowledgeProcessor:
         chunks = []
 
         # Split by person entries (marked by * **Person Name:**)
-        person_pattern = r'\*\s+\*\*([^*]+):\*\*'
-        person_matches = list(re.finditer(person_pattern, content))
+        person_matches = list(_PERSON_RE.finditer(content))
 
         for i, match in enumerate(person_matches):
             start_pos = match.start()
@@ -378,75 +491,190 @@ class KnowledgeProcessor:
 
     def _chunk_list_content(self, content: str, section: str, subsection: str) -> List[Dict[str, Any]]:
         """Chunk list-based content."""
-        chunks = []
-
         # Split by list items while maintaining context
         lines = content.split('\n')
-        current_chunk = []
-        current_size = 0
+        sizes = [_count_tokens(line) for line in lines]
 
-        for line in lines:
-            line_size = len(line)
-
-            if current_size + line_size > self.chunk_size and current_chunk:
-                chunks.append({
-                    "text": '\n'.join(current_chunk),
-                    "section": section,
-                    "subsection": subsection,
-                    "type": "list_chunk"
-                })
-                current_chunk = [line]
-                current_size = line_size
-            else:
-                current_chunk.append(line)
-                current_size += line_size
-
-        if current_chunk:
-            chunks.append({
-                "text": '\n'.join(current_chunk),
+        return [
+            {
+                "text": '\n'.join(lines[start:end]),
                 "section": section,
                 "subsection": subsection,
                 "type": "list_chunk"
-            })
-
-        return chunks
+            }
+            for start, end in _pack_by_size(sizes, self.chunk_size, self.chunk_overlap)
+        ]
 
-    def _chunk_general_content(self, content: str, section: str, subsection: str) -> List[Dict[str, Any]]:
+    def _chunk_general_content(
+        self,
+        content: str,
+        section: str,
+        subsection: str,
+        units: Optional[List[Tuple[int, str]]] = None,
+        embeddings: Optional["np.ndarray"] = None
+    ) -> List[Dict[str, Any]]:
         """Chunk general content with semantic boundaries."""
-        chunks = []
-
         # Split by paragraphs first
         paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
 
-        current_chunk = []
-        current_size = 0
-
-        for paragraph in paragraphs:
-            para_size = len(paragraph)
-
-            if current_size + para_size > self.chunk_size and current_chunk:
-                chunks.append({
-                    "text": '\n\n'.join(current_chunk),
-                    "section": section,
-                    "subsection": subsection,
-                    "type": "content_chunk"
-                })
-                current_chunk = [paragraph]
-                current_size = para_size
+        if PROCESSING_CONFIG.semantic_chunking:
+            if embeddings is not None:
+                texts = self._split_semantic(units, embeddings)
+            elif units is None and sum(map(_count_tokens, paragraphs)) <= self.chunk_size:
+                # Short sections stay whole, as they would have after a topic split
+                texts = ['\n\n'.join(paragraphs)] if paragraphs else []
             else:
-                current_chunk.append(paragraph)
-                current_size += para_size
-
-        if current_chunk:
-            chunks.append({
-                "text": '\n\n'.join(current_chunk),
+                texts = None
+            if texts is not None:
+                return [
+                    {"text": text, "section": section, "subsection": subsection, "type": "content_chunk"}
+                    for text in texts
+                ]
+
+        sizes = [_count_tokens(paragraph) for paragraph in paragraphs]
+
+        return [
+            {
+                "text": '\n\n'.join(paragraphs[start:end]),
                 "section": section,
                 "subsection": subsection,
                 "type": "content_chunk"
-            })
+            }
+            for start, end in _pack_by_size(sizes, self.chunk_size, self.chunk_overlap)
+        ]
 
+    def _semantic_split_units(self, section: Dict[str, Any]) -> Optional[List[Tuple[int, str]]]:
+        """
+        Sentences of a section that will be split by topic.
+
+        Args:
+            section: Parsed section
+
+        Returns:
+            (paragraph index, sentence) pairs, or None if the section is not
+            general content too long for one chunk, or semantic chunking is off
+        """
+        if not PROCESSING_CONFIG.semantic_chunking:
+            return None
+
+        content = section["content"]
+        if self._classify_content_type(content) != "general":
+            return None
+
+        paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
+        if sum(map(_count_tokens, paragraphs)) <= self.chunk_size:
+            return None
+
+        # Sentences with the index of their paragraph, so chunks keep paragraph breaks
+        return [
+            (index, sentence)
+            for index, paragraph in enumerate(paragraphs)
+            for sentence in _SENTENCE_RE.split(paragraph)
+        ]
+
+    def _split_semantic(self, units: List[Tuple[int, str]], embeddings: "np.ndarray") -> List[str]:
+        """
+        Split sentences where the topic shifts between adjacent sentences.
+
+        A chunk is cut wherever the cosine similarity of neighbouring sentences
+        drops below the threshold. A chunk that would grow past ``chunk_size``
+        is cut at its weakest boundary instead, so no chunk is split in the
+        middle of a topic when a better break exists.
+
+        Args:
+            units: (paragraph index, sentence) pairs of the section
+            embeddings: Unit-length embedding of each sentence
+
+        Returns:
+            Chunk texts
+        """
+        import numpy as np
+
+        sentences = [sentence for _, sentence in units]
+        sizes = [_count_tokens(sentence) for sentence in sentences]
+
+        # similarities[i] scores the boundary between sentence i and i + 1
+        similarities = np.einsum('ij,ij->i', embeddings[:-1], embeddings[1:])
+        threshold = PROCESSING_CONFIG.semantic_chunk_threshold
+
+        # Topic cuts are skipped until a chunk holds a quarter of chunk_size, so
+        # short runs are not emitted and then dropped as too small
+        min_size = self.chunk_size // 4
+
+        chunks = []
+        start = 0
+        size = sizes[0]
+
+        for i in range(1, len(sentences)):
+            if similarities[i - 1] < threshold and size >= min_size:
+                cut = i
+            elif size + sizes[i] > self.chunk_size:
+                # Cut at the weakest boundary inside the current chunk
+                cut = start + 1 + int(np.argmin(similarities[start:i]))
+            else:
+                size += sizes[i]
+                continue
+
+            chunks.append(_join_sentences(units[start:cut]))
+            start = cut
+            size = sum(sizes[start:i + 1])
+
+        chunks.append(_join_sentences(units[start:]))
         return chunks
 
+    def _embed_sentences(self, sentences: List[str]) -> Optional["np.ndarray"]:
+        """
+        Embed sentences as unit-length rows, reusing cached embeddings where possible.
+
+        Uncached sentences are sent as concurrent batches, and batches that
+        succeed are cached even if others fail.
+
+        Args:
+            sentences: Sentences of every section split by topic
+
+        Returns:
+            One row per sentence, or None if any sentence could not be embedded
+        """
+        import numpy as np
+        from services.embedding_cache import EmbeddingCache
+
+        embeddings = np.zeros((len(sentences), PROCESSING_CONFIG.embedding_dimension), dtype=np.float32)
+        embedding_cache = EmbeddingCache() if PROCESSING_CONFIG.embedding_cache_enabled else None
+
+        try:
+            cached = embedding_cache.get_many(sentences) if embedding_cache else {}
+            for i, embedding in cached.items():
+                embeddings[i] = embedding
+
+            missing = [i for i in range(len(sentences)) if i not in cached]
+            batches = list(_iter_batches(missing, PROCESSING_CONFIG.embedding_batch_size))
+            results = asyncio.run(self._embed_batches_async([[sentences[i] for i in batch] for batch in batches]))
+            fresh_rows = []
+            for batch, batch_embeddings in zip(batches, results):
+                if batch_embeddings is not None:
+                    embeddings[batch] = np.asarray(batch_embeddings, dtype=np.float32)
+                    fresh_rows.extend(batch)
+
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            np.divide(embeddings, norms, out=embeddings, where=norms > 0)
+
+            if embedding_cache and fresh_rows:
+                embedding_cache.put_many([sentences[i] for i in fresh_rows], embeddings[fresh_rows])
+            if len(fresh_rows) < len(missing):
+                logger.error(
+                    f"Failed to embed {len(missing) - len(fresh_rows)} sentences for semantic chunking"
+                )
+                return None
+            return embeddings
+
+        except Exception as e:
+            logger.error(f"Error embedding sentences for semantic chunking: {str(e)}")
+            return None
+
+        finally:
+            if embedding_cache:
+                embedding_cache.close()
+
     def _calculate_importance_score(self, text: str, entities: List[str], keywords: List[str]) -> float:
         """Calculate importance score for a chunk."""
         score = 0.5  # Base score
@@ -457,12 +685,21 @@ class KnowledgeProcessor:
         # Boost for keywords
         score += len(keywords) * 0.02
 
-        # Boost for certain patterns
-        if any(pattern in text.lower() for pattern in ['significance:', 'impact:', 'notable:', 'important:']):
-            score += 0.1
+        # Boost for certain patterns and for film/person information,
+        # found in one scan that stops once both kinds have been seen
+        has_marker = False
+        has_film_info = False
+        for match in _IMPORTANCE_RE.finditer(text):
+            if match.group(1):
+                has_marker = True
+            else:
+                has_film_info = True
+            if has_marker and has_film_info:
+                break
 
-        # Boost for film/person information
-        if any(pattern in text for pattern in ['Director:', 'Music:', 'Plot:', 'Actors:']):
+        if has_marker:
+            score += 0.1
+        if has_film_info:
             score += 0.15
 
         return min(score, 1.0)  # Cap at 1.0
@@ -471,51 +708,117 @@ class KnowledgeProcessor:
         """
         Generate embeddings for text chunks using Cohere.
 
+        Raises RuntimeError if any chunk could not be embedded, so that no
+        partial result is cached or stored.
+
         Args:
             chunks: List of chunk dictionaries
 
         Returns:
-            Chunks with embeddings added
+            Chunks with embeddings added, each a row of ``self.embedding_matrix``
         """
+        import numpy as np
+        from services.embedding_cache import EmbeddingCache
+
         logger.info(f"Generating embeddings for {len(chunks)} chunks using Cohere")
 
         # Extract texts for batch processing
         texts = [chunk["text"] for chunk in chunks]
 
-        # Process in batches to avoid API limits
-        batch_size = 96  # Cohere's batch limit
-        all_embeddings = []
-
-        for i in range(0, len(texts), batch_size):
-            batch_texts = texts[i:i + batch_size]
-            logger.info(f"Processing batch {i//batch_size + 1}/{(len(texts)-1)//batch_size + 1}")
-
-            try:
-                response = self.cohere_client.embed(
-                    texts=batch_texts,
-                    model=API_CONFIG.cohere_embed_model,
-                    input_type="search_document",
-                    embedding_types=["float"]
-                )
-
-                # Extract embeddings from Cohere response
-                batch_embeddings = response.embeddings.float_
-                all_embeddings.extend(batch_embeddings)
-
-            except Exception as e:
-                logger.error(f"Error generating embeddings for batch: {e}")
-                # Fallback: create zero embeddings with correct dimension (1536 for Cohere embed-v4.0)
-                batch_embeddings = [[0.0] * 1536 for _ in batch_texts]
-                all_embeddings.extend(batch_embeddings)
-
-        # Add embeddings to chunks
+        # One contiguous float32 matrix instead of a Python float list per chunk
+        self.embedding_matrix = np.zeros((len(texts), PROCESSING_CONFIG.embedding_dimension), dtype=np.float32)
+
+        # Only texts that were never embedded before are sent to Cohere
+        embedding_cache = EmbeddingCache() if PROCESSING_CONFIG.embedding_cache_enabled else None
+        cached = embedding_cache.get_many(texts) if embedding_cache else {}
+        for i, embedding in cached.items():
+            self.embedding_matrix[i] = embedding
+        missing = [i for i in range(len(texts)) if i not in cached]
+        logger.info(f"{len(texts) - len(missing)} embeddings cached, {len(missing)} to generate")
+
+        # Batches are sent concurrently on one event loop to hide per-request latency;
+        # gather returns results in submission order, so embeddings line up with texts
+        batches = list(_iter_batches(missing, PROCESSING_CONFIG.embedding_batch_size))
+        results = asyncio.run(self._embed_batches_async([[texts[i] for i in batch] for batch in batches]))
+        fresh_rows = []
+        for batch, batch_embeddings in zip(batches, results):
+            # Failed batches keep their zero rows and are never cached
+            if batch_embeddings is not None:
+                self.embedding_matrix[batch] = np.asarray(batch_embeddings, dtype=np.float32)
+                fresh_rows.extend(batch)
+
+        # Unit length rows make cosine similarity a plain dot product (a single matmul);
+        # zero rows from failed batches are left as they are
+        norms = np.linalg.norm(self.embedding_matrix, axis=1, keepdims=True)
+        np.divide(self.embedding_matrix, norms, out=self.embedding_matrix, where=norms > 0)
+
+        # Successful batches are cached even if others failed, so a retry only re-embeds the rest
+        if embedding_cache:
+            if fresh_rows:
+                embedding_cache.put_many([texts[i] for i in fresh_rows], self.embedding_matrix[fresh_rows])
+            embedding_cache.close()
+
+        # Zero vectors would be cached with the chunks and stored in Qdrant under a
+        # signature that only covers the texts, so they could never be replaced
+        failed = int(np.count_nonzero(norms == 0))
+        if failed:
+            raise RuntimeError(f"Failed to generate embeddings for {failed} of {len(texts)} chunks")
+
+        # Add embeddings to chunks as views into the matrix
         for i, chunk in enumerate(chunks):
-            chunk["embedding"] = all_embeddings[i]
+            chunk["embedding"] = self.embedding_matrix[i]
             chunk["embedding_model"] = "cohere-embed-v4.0"
 
         logger.info("Embeddings generated successfully")
         return chunks
 
+    async def _embed_batches_async(self, batches: List[List[str]]) -> List[Optional[List[List[float]]]]:
+        """Embed all batches concurrently, with at most embedding_max_in_flight requests open."""
+        if not batches:
+            return []
+
+        import cohere
+        import httpx
+
+        semaphore = asyncio.Semaphore(PROCESSING_CONFIG.embedding_max_in_flight)
+
+        # The async client is bound to the event loop it is used on, so each run opens
+        # its own connection pool and closes it when the batches are done
+        async with httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+            timeout=httpx.Timeout(120.0, connect=10.0)
+        ) as http_client:
+            client = cohere.AsyncClientV2(api_key=API_CONFIG.cohere_api_key, httpx_client=http_client)
+
+            async def embed_one(batch_num: int, batch_texts: List[str]) -> Optional[List[List[float]]]:
+                async with semaphore:
+                    return await self._embed_batch_async(client, batch_num, batch_texts, len(batches))
+
+            return await asyncio.gather(*(embed_one(i, batch) for i, batch in enumerate(batches)))
+
+    async def _embed_batch_async(
+        self,
+        client: "cohere.AsyncClientV2",
+        batch_num: int,
+        batch_texts: List[str],
+        batch_count: int
+    ) -> Optional[List[List[float]]]:
+        """Embed one batch, returning None if the request fails."""
+        logger.info("Processing batch %d/%d", batch_num + 1, batch_count)
+        try:
+            response = await client.embed(
+                texts=batch_texts,
+                model=API_CONFIG.cohere_embed_model,
+                input_type="search_document",
+                embedding_types=["float"],
+                truncate="END"  # Over-long texts are trimmed instead of failing the batch
+            )
+            return response.embeddings.float_
+        except Exception as e:
+            logger.error(f"Error generating embeddings for batch: {e}")
+            return None
+
 def process_knowledge_base(kb_file_path: str) -> List[Dict[str, Any]]:
     """
     Process knowledge base file and return chunks with embeddings using advanced chunking.
@@ -528,11 +831,8 @@ def process_knowledge_base(kb_file_path: str) -> List[Dict[str, Any]]:
     """
     processor = KnowledgeProcessor()
 
-    # Load knowledge base
-    text = processor.load_knowledge_base(kb_file_path)
-
-    # Use advanced chunking strategy
-    chunks = processor.chunk_text_advanced(text)
+    # Stream the knowledge base through the advanced chunking strategy
+    chunks = processor.chunk_file_advanced(kb_file_path)
 
     # Generate embeddings using Cohere
     chunks_with_embeddings = processor.generate_embeddings(chunks)
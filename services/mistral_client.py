@@ -0,0 +1,22 @@
+"""
+Shared Mistral HTTP connection pool.
+"""
+import functools
+
+import httpx
+
+@functools.lru_cache(maxsize=1)
+def get_mistral_http_client() -> httpx.Client:
+    """
+    Get the process-wide HTTP client for synchronous Mistral calls.
+
+    Async calls cannot share a pool this way: an httpx.AsyncClient is
+    bound to the event loop it first runs on, and each pipeline run
+    starts a new loop.
+
+    Returns:
+        Shared HTTP client
+    """
+    return httpx.Client(
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+    )
@@ -1,42 +1,355 @@
 """
 RAG Agent for answering questions using retrieved context with Cohere reranking.
 """
+import asyncio
+import hashlib
 import logging
+import re
+import threading
 import time
-from typing import List, Dict, Any, Optional
+from string import Template
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from mistralai import Mistral
 import cohere
+import httpx
+import numpy as np
 
-from config import API_CONFIG, PROCESSING_CONFIG, RAG_SYSTEM_PROMPT, QUESTION_TYPES
+try:
+    from rank_bm25 import BM25Okapi
+    HAS_BM25 = True
+except ImportError:
+    HAS_BM25 = False
+
+from config import API_CONFIG, PROCESSING_CONFIG, RAG_SYSTEM_PROMPT, QuestionType
 from services.vector_store import VectorStore
+from services.semantic_cache import SemanticCache
+from services.cohere_client import get_cohere_client
+from services.mistral_client import get_mistral_http_client
+from utils.rate_limiter import RateLimiter
+from utils.vector_ring import VectorRing
 
 logger = logging.getLogger(__name__)
 
+BASE_PROMPT_TEMPLATE = Template("""
+Context:
+$context
+
+Question: $question
+""")
+
+# Instructions appended to the base prompt for each question type
+PROMPT_TEMPLATES: Dict[QuestionType, Template] = {
+    QuestionType.MULTIPLE_CHOICE_SINGLE: Template("""
+Original Options:
+$options
+
+CRITICAL FORMATTING RULES:
+1. Copy the EXACT option list above
+2. Add ✓ symbol ONLY after the correct option
+3. Keep all other options unchanged
+4. Do NOT add "Answer:", explanations, or extra text
+5. Output ONLY the option list with one ✓ mark
+6. Put each option on a separate line
+
+REQUIRED OUTPUT FORMAT (each option on new line):
+A. [Option text]
+B. [Option text] ✓
+C. [Option text]
+D. [Option text]
+
+Example:
+A. Om Shanti Om
+B. Slumdog Millionaire ✓
+C. Rab Ne Bana Di Jodi
+D. 3 Idiots
+"""),
+    QuestionType.MULTIPLE_CHOICE_MULTI: Template("""
+Original Options:
+$options
+
+CRITICAL FORMATTING RULES:
+1. Copy the EXACT option list above
+2. Add ✓ symbol after ALL correct options
+3. Keep incorrect options unchanged
+4. Do NOT add "Answer:", explanations, or extra text
+5. Output ONLY the option list with ✓ marks
+6. Put each option on a separate line
+
+REQUIRED OUTPUT FORMAT (each option on new line):
+A. [Option text] ✓
+B. [Option text]
+C. [Option text] ✓
+D. [Option text]
+
+Example:
+A. Karan Johar ✓
+B. Rakeysh Omprakash Mehra
+C. Aditya Chopra ✓
+D. Sanjay Leela Bhansali
+"""),
+    QuestionType.TRUE_FALSE: Template("""
+Original Statement: $question
+
+CRITICAL FORMATTING RULES:
+1. Show both True and False options
+2. Mark the correct option with ✓ symbol
+3. Do NOT add "Answer:", explanations, or extra text
+4. Put each option on a separate line
+
+REQUIRED OUTPUT FORMAT:
+True ✓
+False
+(if statement is true)
+
+OR
+
+True
+False ✓
+(if statement is false)
+
+Example for a false statement:
+True
+False ✓
+"""),
+    QuestionType.FILL_IN_BLANK: Template("""
+Original Text with Blanks: $question
+
+CRITICAL: Take the original sentence/paragraph above and fill in ALL the blanks with correct answers.
+Your response should be the COMPLETE text with blanks replaced by answers.
+Do NOT write "Answer:" or provide separate words - show the full completed text.
+
+Example: "The movie _____ was directed by _____" becomes "The movie Lagaan was directed by Ashutosh Gowariker"
+"""),
+    QuestionType.MATCH_FOLLOWING: Template("""
+Original Question: $question
+
+CRITICAL FORMATTING RULES:
+1. Show each matching pair on a separate line
+2. Use arrows (→) to connect items with their matches
+3. Number each matching pair (1., 2., 3., etc.)
+4. Do NOT add "Answer:" or explanations
+5. Put each match on a new line
+
+REQUIRED OUTPUT FORMAT:
+1. [Item A] → [Match X]
+2. [Item B] → [Match Y]
+3. [Item C] → [Match Z]
+
+Example:
+1. Dil Chahta Hai → Farhan Akhtar
+2. Lagaan → Ashutosh Gowariker
+3. Veer-Zaara → Yash Chopra
+4. Chak De! India → Shimit Amin
+5. Black Friday → Anurag Kashyap
+"""),
+    QuestionType.CHECKBOX: Template("""
+Original Checkbox List:
+$options
+
+CRITICAL: Reproduce the EXACT checkbox list above, but mark correct items with ☑ and keep incorrect items as ☐.
+Your response should be the complete checkbox list with appropriate markings.
+Do NOT write "Answer:" or any explanation - just the marked checkbox list.
+
+Format: ☑ Correct option 1  ☐ Incorrect option  ☑ Correct option 2
+"""),
+    QuestionType.TABLE_COMPLETION: Template("""
+Original Question with Table: $question
+
+CRITICAL: If the question contains a table structure, recreate the EXACT table with empty cells filled in.
+Maintain the table format and structure. Fill in missing data based on the context.
+Do NOT write "Answer:" - show the completed table.
+
+Example:
+| Movie | Director | Year |
+|-------|----------|------|
+| Lagaan | Ashutosh Gowariker | 2001 |
+| 3 Idiots | Rajkumar Hirani | 2009 |
+"""),
+    QuestionType.NUMERICAL_ANSWER: Template("\nPlease provide the numerical answer with appropriate units if applicable. Be precise and concise."),
+    QuestionType.DATE_TIME: Template("\nPlease provide the specific date, year, or time period. Format dates clearly (e.g., 'Year: 2001' or 'Period: 2000-2010')."),
+    QuestionType.ORDERING_SEQUENCE: Template("\nPlease provide the correct chronological or logical order. Number the items clearly (1, 2, 3, etc.)."),
+    QuestionType.CATEGORIZATION: Template("\nPlease categorize or classify the items mentioned. Provide clear categories and explain the classification criteria."),
+    QuestionType.COMPARISON: Template("\nPlease compare the items mentioned. Highlight similarities, differences, and key distinguishing features."),
+    QuestionType.CAUSE_EFFECT: Template("\nPlease explain the cause and effect relationship. Clearly identify what caused what and the resulting impact."),
+    QuestionType.DEFINITION: Template("\nPlease provide a clear, accurate definition. Include key characteristics and context if relevant."),
+    QuestionType.EXPLANATION: Template("\nPlease provide a detailed explanation. Break down complex concepts and provide context for better understanding."),
+    QuestionType.ANALYSIS: Template("\nPlease provide an analytical response. Examine the topic critically, considering multiple perspectives and implications."),
+    QuestionType.EVALUATION: Template("\nPlease provide an evaluative response. Assess the topic's significance, quality, impact, or value based on the available information."),
+    QuestionType.TEXTUAL_ANSWER: Template("\nPlease provide a comprehensive answer based on the context provided."),
+}
+
+# Instructions for option-based question types that arrive without options
+OPTIONLESS_PROMPTS: Dict[QuestionType, str] = {
+    QuestionType.MULTIPLE_CHOICE_SINGLE: "\nProvide the correct answer in a concise format.",
+    QuestionType.MULTIPLE_CHOICE_MULTI: "\nProvide all correct answers with clear marking.",
+    QuestionType.CHECKBOX: "\nUse ☑ for correct items and ☐ for incorrect items.",
+}
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_WORD_RE = re.compile(r'\w+')
+
+# Answer post-processing patterns
+_UNWANTED_PREFIXES = (
+    "Answer:", "answer:", "ANSWER:",
+    "The answer is:", "The correct answer is:",
+    "Based on the context:", "According to the context:"
+)
+_OPTION_LINE_RE = re.compile(r'^[A-Z]\.')
+_OPTION_SPLIT_RE = re.compile(r'\s+([A-Z]\.)')
+_TRUE_FALSE_SPLIT_RE = re.compile(r'\s+(True|False)')
+_NUMBERED_LINE_RE = re.compile(r'^\d+\.')
+_NUMBERED_SPLIT_RE = re.compile(r'\s+(\d+\.)')
+
+def _tokenize(text: str) -> List[str]:
+    """Split text into lower-case word tokens for keyword search."""
+    return _WORD_RE.findall(text.lower())
+
+# Phrases quoted in a question, in straight or curly double quotes
+_QUOTED_RE = re.compile(r'["\u201c]([^"\u201c\u201d]{3,})["\u201d]')
+
+def _is_literal_hit(question: str, top_text: str) -> bool:
+    """Check whether every phrase the question quotes appears verbatim in the top chunk."""
+    phrases = _QUOTED_RE.findall(question)
+    if not phrases:
+        return False
+    top_text = top_text.lower()
+    return all(phrase.strip().lower() in top_text for phrase in phrases)
+
+# Fields copied from an answered question to its duplicates
+_ANSWER_FIELDS = ("answer", "context_used", "error")
+
+def _keep_matching_lines(answer: str, keep: Callable[[str], Any]) -> str:
+    """Keep the stripped, non-empty lines accepted by ``keep``, or the whole answer if none are."""
+    kept = [line for line in (raw.strip() for raw in answer.split('\n')) if line and keep(line)]
+    return '\n'.join(kept) if kept else answer
+
+# Question types whose answers are a fixed list of lines, with the check for each line
+_ANSWER_LINE_CHECKS: Dict[QuestionType, Callable[[str], Any]] = {
+    QuestionType.MULTIPLE_CHOICE_SINGLE: _OPTION_LINE_RE.match,
+    QuestionType.MULTIPLE_CHOICE_MULTI: _OPTION_LINE_RE.match,
+    QuestionType.TRUE_FALSE: lambda line: line.startswith(('True', 'False')),
+}
+
+def _expected_answer_lines(question_type: str, options: Optional[List[str]]) -> int:
+    """Number of lines a complete answer has, or 0 if it is not known in advance."""
+    if question_type == QuestionType.TRUE_FALSE:
+        return 2
+    if question_type in _ANSWER_LINE_CHECKS and options:
+        return len(options)
+    return 0
+
+def _question_key(question_data: Dict[str, Any]) -> Tuple[str, str, Tuple[str, ...]]:
+    """Key under which questions are duplicates: normalized text, type and options."""
+    text = _WHITESPACE_RE.sub(" ", question_data["question_text"].strip().lower())
+    return text, str(question_data["question_type"]), tuple(question_data.get("options") or ())
+
+# Output token caps for question types whose answers are short; others use the default
+ANSWER_MAX_TOKENS: Dict[QuestionType, int] = {
+    QuestionType.TRUE_FALSE: 16,
+    QuestionType.NUMERICAL_ANSWER: 64,
+    QuestionType.DATE_TIME: 64,
+    QuestionType.ANALYSIS: 1024,
+    QuestionType.EVALUATION: 1024,
+}
+DEFAULT_MAX_TOKENS = 512
+
 class RAGAgent:
     """RAG agent for question answering using context retrieval."""
 
-    def __init__(self, vector_store: VectorStore):
+    def __init__(self, vector_store: VectorStore, cache_namespace: str = None):
         """
         Initialize RAG agent.
 
         Args:
             vector_store: Configured vector store instance
+            cache_namespace: Namespace for cached answers, e.g. a knowledge base hash;
+                defaults to the signature of the knowledge base stored in the collection
         """
         self.vector_store = vector_store
 
-        # Initialize Mistral client
-        self.mistral_client = Mistral(api_key=API_CONFIG.mistral_api_key)
+        # Initialize Mistral client; sync calls reuse the process-wide connection pool
+        self.mistral_client = Mistral(api_key=API_CONFIG.mistral_api_key, client=get_mistral_http_client())
         self.model = API_CONFIG.mistral_model
 
         # Initialize Cohere client for embeddings and reranking
-        self.cohere_client = cohere.ClientV2(api_key=API_CONFIG.cohere_api_key)
-
-    def answer_question(self, question_data: Dict[str, Any]) -> Dict[str, Any]:
+        self.cohere_client = get_cohere_client()
+
+        # Async clients are bound to the event loop they run on, so they are opened
+        # for each run by `async with agent` while the caches below outlive runs
+        self._async_http: Optional[httpx.AsyncClient] = None
+        self.mistral_async_client: Optional[Mistral] = None
+        self.cohere_async_client: Optional[cohere.AsyncClientV2] = None
+        self._llm_limiter: Optional[RateLimiter] = None
+
+        # Keyword index over all chunks, built on first use by the fallback retrieval
+        self._keyword_index = None
+        self._keyword_corpus: List[str] = []
+        self._keyword_lock = threading.Lock()
+
+        # Reranked contexts of earlier queries, keyed by their unit-length embeddings
+        self._retrieval_cache = VectorRing(PROCESSING_CONFIG.retrieval_cache_size)
+
+        # Cohere relevance scores by (query digest, chunk digest), oldest first, with the time
+        # they were stored; digests keep the cache from holding copies of every chunk body
+        self._rerank_scores: Dict[Tuple[bytes, bytes], Tuple[float, float]] = {}
+
+        # Answer cache for repeated and paraphrased questions
+        self.answer_cache = None
+        # Without an explicit namespace, key on the knowledge base actually stored in the
+        # collection; the collection name is shared by every knowledge base
+        if cache_namespace is None:
+            cache_namespace = vector_store.get_kb_signature()
+            if cache_namespace is None:
+                logger.warning("Collection has no knowledge base signature; answer cache disabled")
+        if PROCESSING_CONFIG.semantic_cache_enabled and cache_namespace:
+            # Answers depend on the models as well as the knowledge base, so switching
+            # any of them starts a fresh namespace instead of serving stale answers
+            namespace = "|".join([
+                cache_namespace,
+                API_CONFIG.mistral_model,
+                API_CONFIG.cohere_embed_model,
+                API_CONFIG.cohere_rerank_model
+            ])
+            self.answer_cache = SemanticCache(namespace)
+
+    async def __aenter__(self) -> "RAGAgent":
+        """Open the async clients for the running event loop."""
+        # Async Mistral and Cohere calls share one HTTP/2 pool, so concurrent
+        # questions multiplex over a few kept-alive connections
+        self._async_http = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+            timeout=httpx.Timeout(120.0, connect=10.0)
+        )
+        self.mistral_async_client = Mistral(api_key=API_CONFIG.mistral_api_key, async_client=self._async_http)
+        self.cohere_async_client = cohere.AsyncClientV2(
+            api_key=API_CONFIG.cohere_api_key,
+            httpx_client=self._async_http
+        )
+
+        # Keeps concurrent LLM calls within the MistralAI rate limit
+        self._llm_limiter = RateLimiter(PROCESSING_CONFIG.llm_min_interval)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        """Close the async clients opened by __aenter__."""
+        await self._async_http.aclose()
+        self._async_http = None
+        self.mistral_async_client = None
+        self.cohere_async_client = None
+        self._llm_limiter = None
+
+    def answer_question(
+        self,
+        question_data: Dict[str, Any],
+        query_embedding: Optional[np.ndarray] = None
+    ) -> Dict[str, Any]:
         """
         Answer a single question using RAG.
 
         Args:
             question_data: Question dictionary with text, type, options, etc.
+            query_embedding: Precomputed question embedding, embedded here if None
 
         Returns:
             Question data with answer added
@@ -44,19 +357,98 @@ class RAGAgent:
         try:
             question_text = question_data["question_text"]
             question_type = question_data["question_type"]
+            options = question_data.get("options")
+
+            logger.info("Answering question: %.100s...", question_text)
+
+            # Exact repeats are answered without any API call
+            cached = self._lookup_exact(question_text, question_type, options)
+            if cached:
+                return self._apply_cached_answer(question_data, cached)
 
-            logger.info(f"Answering question: {question_text[:100]}...")
+            # Embed the question once for both the cache and retrieval
+            if self.answer_cache:
+                if query_embedding is None:
+                    try:
+                        query_embedding = self._embed_query(question_text)
+                    except Exception as e:
+                        logger.warning(f"Could not embed question for cache lookup: {str(e)}")
+
+                if query_embedding is not None:
+                    cached = self.answer_cache.lookup(query_embedding, question_type, options)
+                    if cached:
+                        return self._apply_cached_answer(question_data, cached)
 
             # Retrieve relevant context with reranking
-            context = self._retrieve_context_with_reranking(question_text)
+            context = self._retrieve_context_with_reranking(question_text, query_embedding)
 
             # Generate answer based on question type
-            answer = self._generate_answer(question_text, question_type, context, question_data.get("options"))
+            answer = self._generate_answer(question_text, question_type, context, options)
 
             # Update question data with answer
             question_data["answer"] = answer
             question_data["context_used"] = len(context)
 
+            self._store_answer(question_text, question_type, options, query_embedding, answer, context)
+
+            return question_data
+
+        except Exception as e:
+            logger.error(f"Error answering question: {str(e)}")
+            question_data["answer"] = "Error: Could not generate answer"
+            question_data["error"] = str(e)
+            return question_data
+
+    async def answer_question_async(
+        self,
+        question_data: Dict[str, Any],
+        query_embedding: Optional[np.ndarray] = None,
+        similar_chunks: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Answer a single question using RAG without blocking the event loop.
+
+        Must be awaited inside ``async with agent``, which opens the async clients.
+
+        Args:
+            question_data: Question dictionary with text, type, options, etc.
+            query_embedding: Precomputed question embedding, embedded here if None
+            similar_chunks: Precomputed search hits for query_embedding, searched here if None
+
+        Returns:
+            Question data with answer added
+        """
+        try:
+            question_text = question_data["question_text"]
+            question_type = question_data["question_type"]
+            options = question_data.get("options")
+
+            logger.info("Answering question: %.100s...", question_text)
+
+            cached = self._lookup_exact(question_text, question_type, options)
+            if cached:
+                return self._apply_cached_answer(question_data, cached)
+
+            if self.answer_cache:
+                if query_embedding is None:
+                    try:
+                        query_embedding = await self._embed_query_async(question_text)
+                    except Exception as e:
+                        logger.warning(f"Could not embed question for cache lookup: {str(e)}")
+
+                if query_embedding is not None:
+                    cached = self.answer_cache.lookup(query_embedding, question_type, options)
+                    if cached:
+                        return self._apply_cached_answer(question_data, cached)
+
+            context = await self._retrieve_context_with_reranking_async(question_text, query_embedding, similar_chunks)
+            answer = await self._generate_answer_async(question_text, question_type, context, options)
+
+            question_data["answer"] = answer
+            question_data["context_used"] = len(context)
+
+            self._store_answer(question_text, question_type, options, query_embedding, answer, context)
+
             return question_data
 
         except Exception as e:
@@ -65,26 +457,208 @@ class RAGAgent:
             question_data["error"] = str(e)
             return question_data
 
-    def _retrieve_context_with_reranking(self, question: str) -> List[str]:
+    def _lookup_exact(
+        self,
+        question_text: str,
+        question_type: str,
+        options: Optional[List[str]]
+    ) -> Optional[Dict[str, Any]]:
+        """Look up an exact repeat of the question in the answer cache."""
+        if not self.answer_cache:
+            return None
+        cached = self.answer_cache.lookup_exact(question_text, question_type, options)
+        if cached:
+            logger.debug("Exact answer cache hit")
+        return cached
+
+    def _apply_cached_answer(self, question_data: Dict[str, Any], cached: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill question data from a cached answer."""
+        question_data["answer"] = cached["answer"]
+        question_data["context_used"] = len(cached["sources"])
+        return question_data
+
+    def _store_answer(
+        self,
+        question_text: str,
+        question_type: str,
+        options: Optional[List[str]],
+        query_embedding: Optional[np.ndarray],
+        answer: str,
+        context: List[str]
+    ):
+        """Cache a generated answer unless generation failed."""
+        if not self.answer_cache or query_embedding is None:
+            return
+        if answer.startswith("Error generating answer"):
+            return
+        try:
+            self.answer_cache.put(question_text, question_type, options, query_embedding, answer, context)
+        except Exception as e:
+            logger.warning(f"Could not cache answer: {str(e)}")
+
+    def _embed_query(self, question: str) -> np.ndarray:
+        """Generate a float32 search query embedding using Cohere."""
+        query_response = self.cohere_client.embed(
+            texts=[question],
+            model=API_CONFIG.cohere_embed_model,
+            input_type="search_query",
+            embedding_types=["float"],
+            truncate="END"
+        )
+        return np.asarray(query_response.embeddings.float_[0], dtype=np.float32)
+
+    async def _embed_query_async(self, question: str) -> np.ndarray:
+        """Async counterpart of _embed_query."""
+        query_response = await self.cohere_async_client.embed(
+            texts=[question],
+            model=API_CONFIG.cohere_embed_model,
+            input_type="search_query",
+            embedding_types=["float"],
+            truncate="END"
+        )
+        return np.asarray(query_response.embeddings.float_[0], dtype=np.float32)
+
+    def _should_rerank(self, question: str, similar_chunks: List[Dict[str, Any]]) -> bool:
+        """
+        Decide whether reranking can improve on the vector search order.
+
+        Reranking is skipped when it is disabled, when every hit is kept anyway,
+        when the top hit is already a confident match, and for literal lookups
+        whose quoted phrases all appear in the top hit.
+
+        With no more than rerank_top_n hits, all of them reach the prompt either
+        way; they are then passed in vector search order rather than rerank order.
+
+        Args:
+            question: Question text
+            similar_chunks: Search hits, best first
+
+        Returns:
+            True if the hits should be reranked
+        """
+        if not PROCESSING_CONFIG.use_reranker or len(similar_chunks) <= PROCESSING_CONFIG.rerank_top_n:
+            return False
+
+        top_chunk = similar_chunks[0]
+        if top_chunk["score"] >= PROCESSING_CONFIG.rerank_skip_threshold:
+            logger.debug("Skipping rerank: top score %.3f", top_chunk["score"])
+            return False
+        if _is_literal_hit(question, top_chunk["text"]):
+            logger.debug("Skipping rerank: quoted phrases found in top chunk")
+            return False
+        return True
+
+    def _unit_vector(self, query_embedding: np.ndarray) -> np.ndarray:
+        """Scale a query embedding to unit length so dot products are cosine similarities."""
+        vector = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _get_cached_context(self, query_vector: np.ndarray) -> Optional[List[str]]:
+        """Look up reranked context of an earlier, near-identical query."""
+        if not len(self._retrieval_cache):
+            return None
+
+        similarities = self._retrieval_cache.similarities(query_vector)
+        best = int(np.argmax(similarities))
+        if similarities[best] >= PROCESSING_CONFIG.retrieval_cache_threshold:
+            logger.debug("Retrieval cache hit (similarity %.3f)", similarities[best])
+            return list(self._retrieval_cache.values[best])
+        return None
+
+    def _put_cached_context(self, query_vector: np.ndarray, context: List[str]):
+        """Store reranked context, overwriting the oldest entry when full."""
+        self._retrieval_cache.add(query_vector, list(context))
+
+    @staticmethod
+    def _rerank_keys(question: str, texts: List[str]) -> List[Tuple[bytes, bytes]]:
+        """Build the rerank score cache keys of (query, chunk) pairs, hashing each text once."""
+        question_digest = hashlib.blake2b(question.encode(), digest_size=16).digest()
+        return [(question_digest, hashlib.blake2b(text.encode(), digest_size=16).digest()) for text in texts]
+
+    def _cached_rerank_scores(self, keys: List[Tuple[bytes, bytes]]) -> List[Optional[float]]:
+        """
+        Look up rerank scores of earlier (query, chunk) pairs.
+
+        Relevance scores are computed per pair, so a score stays valid whichever
+        other chunks it was ranked with.
+
+        Args:
+            keys: Keys from _rerank_keys of the chunks to score
+
+        Returns:
+            Scores aligned with ``keys``; None where a chunk still needs scoring
+        """
+        # Entries are kept in insertion order, so expired ones are all at the front
+        expired_before = time.monotonic() - PROCESSING_CONFIG.rerank_cache_ttl
+        while self._rerank_scores:
+            oldest = next(iter(self._rerank_scores))
+            if self._rerank_scores[oldest][1] >= expired_before:
+                break
+            del self._rerank_scores[oldest]
+
+        scores = []
+        for key in keys:
+            entry = self._rerank_scores.get(key)
+            scores.append(entry[0] if entry else None)
+        return scores
+
+    def _store_rerank_scores(self, keys: List[Tuple[bytes, bytes]], scores: List[Optional[float]], missing: List[int], results):
+        """
+        Fill in and cache the scores Cohere returned for the missing chunks.
+
+        Args:
+            keys: Keys from _rerank_keys of the chunks that were scored
+            scores: Scores aligned with ``keys``, updated in place
+            missing: Indices into ``keys`` that were sent to Cohere, in request order
+            results: Cohere rerank results for the missing chunks
+        """
+        now = time.monotonic()
+        for result in results:
+            i = missing[result.index]
+            scores[i] = result.relevance_score
+            key = keys[i]
+            # Re-inserting moves the key to the end, keeping entries in age order
+            self._rerank_scores.pop(key, None)
+            self._rerank_scores[key] = (result.relevance_score, now)
+
+        while len(self._rerank_scores) > PROCESSING_CONFIG.rerank_cache_size:
+            del self._rerank_scores[next(iter(self._rerank_scores))]
+
+    def _top_reranked(self, texts: List[str], scores: List[Optional[float]]) -> List[str]:
+        """Pick the rerank_top_n highest-scoring texts, best first."""
+        ranked = sorted(
+            (i for i, score in enumerate(scores) if score is not None),
+            key=lambda i: scores[i],
+            reverse=True
+        )
+        return [texts[i] for i in ranked[:PROCESSING_CONFIG.rerank_top_n]]
+
+    def _retrieve_context_with_reranking(
+        self,
+        question: str,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> List[str]:
         """
         Retrieve relevant context for a question with Cohere reranking.
 
         Args:
             question: Question text
+            query_embedding: Precomputed query embedding, embedded here if None
 
         Returns:
             List of relevant text chunks (reranked)
         """
         try:
             # Step 1: Generate query embedding using Cohere
-            query_response = self.cohere_client.embed(
-                texts=[question],
-                model=API_CONFIG.cohere_embed_model,
-                input_type="search_query",
-                embedding_types=["float"]
-            )
-            # Extract query embedding from Cohere response
-            query_embedding = query_response.embeddings.float_[0]
+            if query_embedding is None:
+                query_embedding = self._embed_query(question)
+
+            # Similar queries retrieve the same context, so reuse it
+            query_vector = self._unit_vector(query_embedding)
+            cached_context = self._get_cached_context(query_vector)
+            if cached_context is not None:
+                return cached_context
 
             # Step 2: Search for similar chunks
             similar_chunks = self.vector_store.search_similar(
@@ -96,28 +670,32 @@ class RAGAgent:
                 logger.warning("No similar chunks found")
                 return []
 
-            # Step 3: Rerank using Cohere if enabled
-            if PROCESSING_CONFIG.use_reranker and len(similar_chunks) > 1:
+            # Step 3: Rerank using Cohere if enabled and it can change which chunks are kept
+            if self._should_rerank(question, similar_chunks):
                 context_texts = [chunk["text"] for chunk in similar_chunks]
 
-                rerank_response = self.cohere_client.rerank(
-                    model=API_CONFIG.cohere_rerank_model,
-                    query=question,
-                    documents=context_texts,
-                    top_n=PROCESSING_CONFIG.rerank_top_n
-                )
-
-                # Extract reranked texts
-                reranked_texts = []
-                for result in rerank_response.results:
-                    reranked_texts.append(context_texts[result.index])
-
-                logger.info(f"Retrieved and reranked {len(reranked_texts)} context chunks")
+                # Only chunks not scored against this query before go to Cohere
+                rerank_keys = self._rerank_keys(question, context_texts)
+                scores = self._cached_rerank_scores(rerank_keys)
+                missing = [i for i, score in enumerate(scores) if score is None]
+                if missing:
+                    rerank_response = self.cohere_client.rerank(
+                        model=API_CONFIG.cohere_rerank_model,
+                        query=question,
+                        documents=[context_texts[i] for i in missing]
+                    )
+                    self._store_rerank_scores(rerank_keys, scores, missing, rerank_response.results)
+
+                reranked_texts = self._top_reranked(context_texts, scores)
+
+                logger.debug("Retrieved and reranked %d context chunks", len(reranked_texts))
+                self._put_cached_context(query_vector, reranked_texts)
                 return reranked_texts
             else:
                 # No reranking, just return top chunks
                 context_texts = [chunk["text"] for chunk in similar_chunks[:PROCESSING_CONFIG.rerank_top_n]]
-                logger.info(f"Retrieved {len(context_texts)} context chunks (no reranking)")
+                logger.debug("Retrieved %d context chunks (no reranking)", len(context_texts))
+                self._put_cached_context(query_vector, context_texts)
                 return context_texts
 
         except Exception as e:
@@ -125,15 +703,149 @@ class RAGAgent:
             # Fallback to basic retrieval
             return self._retrieve_context_fallback(question)
 
+    async def embed_questions_async(self, questions: List[Dict[str, Any]]) -> List[Optional[np.ndarray]]:
+        """
+        Embed many questions with one Cohere request per batch.
+
+        Questions with an exact answer cache hit are not embedded.
+
+        Args:
+            questions: Question dictionaries
+
+        Returns:
+            Embeddings aligned with ``questions``; None where a question was
+            skipped or its batch failed, so it is embedded on its own later
+        """
+        embeddings: List[Optional[np.ndarray]] = [None] * len(questions)
+        pending = [
+            i for i, question_data in enumerate(questions)
+            if not (self.answer_cache and self.answer_cache.lookup_exact(
+                question_data["question_text"], question_data["question_type"], question_data.get("options")
+            ))
+        ]
+        batch_size = PROCESSING_CONFIG.embedding_batch_size
+
+        async def embed_batch(batch: List[int]):
+            try:
+                response = await self.cohere_async_client.embed(
+                    texts=[questions[i]["question_text"] for i in batch],
+                    model=API_CONFIG.cohere_embed_model,
+                    input_type="search_query",
+                    embedding_types=["float"],
+                    truncate="END"
+                )
+            except Exception as e:
+                logger.warning(f"Could not batch-embed {len(batch)} questions: {str(e)}")
+                return
+            # One float32 matrix per batch; each question gets a row view
+            matrix = np.asarray(response.embeddings.float_, dtype=np.float32)
+            for i, embedding in zip(batch, matrix):
+                embeddings[i] = embedding
+
+        await asyncio.gather(*(
+            embed_batch(pending[start:start + batch_size])
+            for start in range(0, len(pending), batch_size)
+        ))
+        return embeddings
+
+    async def _retrieve_context_with_reranking_async(
+        self,
+        question: str,
+        query_embedding: Optional[np.ndarray] = None,
+        similar_chunks: Optional[List[Dict[str, Any]]] = None
+    ) -> List[str]:
+        """
+        Async counterpart of _retrieve_context_with_reranking.
+
+        Args:
+            question: Question text
+            query_embedding: Precomputed query embedding, embedded here if None
+            similar_chunks: Precomputed search hits for query_embedding, searched here if None
+
+        Returns:
+            List of relevant text chunks (reranked)
+        """
+        try:
+            if query_embedding is None:
+                query_embedding = await self._embed_query_async(question)
+
+            query_vector = self._unit_vector(query_embedding)
+            cached_context = self._get_cached_context(query_vector)
+            if cached_context is not None:
+                return cached_context
+
+            # Qdrant client is synchronous, so run the search in a worker thread
+            if similar_chunks is None:
+                similar_chunks = await asyncio.to_thread(
+                    self.vector_store.search_similar,
+                    query_embedding=query_embedding,
+                    top_k=PROCESSING_CONFIG.top_k_results
+                )
+
+            if not similar_chunks:
+                logger.warning("No similar chunks found")
+                return []
+
+            if self._should_rerank(question, similar_chunks):
+                context_texts = [chunk["text"] for chunk in similar_chunks]
+
+                rerank_keys = self._rerank_keys(question, context_texts)
+                scores = self._cached_rerank_scores(rerank_keys)
+                missing = [i for i, score in enumerate(scores) if score is None]
+                if missing:
+                    rerank_response = await self.cohere_async_client.rerank(
+                        model=API_CONFIG.cohere_rerank_model,
+                        query=question,
+                        documents=[context_texts[i] for i in missing]
+                    )
+                    self._store_rerank_scores(rerank_keys, scores, missing, rerank_response.results)
+
+                reranked_texts = self._top_reranked(context_texts, scores)
+
+                logger.debug("Retrieved and reranked %d context chunks", len(reranked_texts))
+                self._put_cached_context(query_vector, reranked_texts)
+                return reranked_texts
+            else:
+                context_texts = [chunk["text"] for chunk in similar_chunks[:PROCESSING_CONFIG.rerank_top_n]]
+                logger.debug("Retrieved %d context chunks (no reranking)", len(context_texts))
+                self._put_cached_context(query_vector, context_texts)
+                return context_texts
+
+        except Exception as e:
+            logger.error(f"Error retrieving context with reranking: {str(e)}")
+            # The Qdrant scroll and BM25 build block, so keep them off the event loop
+            return await asyncio.to_thread(self._retrieve_context_fallback, question)
+
     def _retrieve_context_fallback(self, question: str) -> List[str]:
-        """Fallback context retrieval without reranking."""
+        """
+        Fallback context retrieval by BM25 keyword search when embedding or reranking fails.
+
+        Args:
+            question: Question text
+
+        Returns:
+            Best matching chunk texts, or an empty list if no index is available
+        """
         try:
-            # Simple keyword-based retrieval as fallback
-            logger.warning("Using fallback context retrieval")
+            logger.warning("Using fallback keyword retrieval")
+
+            if not HAS_BM25:
+                logger.warning("rank_bm25 is not installed, answering without context")
+                return []
 
-            # Get all chunks and do simple text matching
-            # This is a simplified fallback - in production you might want a more sophisticated approach
-            return [f"Fallback context for question: {question}"]
+            # Questions failing together during an outage fall back from several worker
+            # threads; only the first one scrolls the collection and builds the index
+            with self._keyword_lock:
+                if self._keyword_index is None:
+                    corpus = self.vector_store.get_all_texts()
+                    if not corpus:
+                        return []
+                    self._keyword_index = BM25Okapi([_tokenize(text) for text in corpus])
+                    self._keyword_corpus = corpus
+
+            return self._keyword_index.get_top_n(
+                _tokenize(question), self._keyword_corpus, n=PROCESSING_CONFIG.rerank_top_n
+            )
 
         except Exception as e:
             logger.error(f"Fallback retrieval also failed: {str(e)}")
@@ -171,7 +883,9 @@ class RAGAgent:
                 messages=[
                     {"role": "system", "content": RAG_SYSTEM_PROMPT},
                     {"role": "user", "content": user_prompt}
-                ]
+                ],
+                max_tokens=ANSWER_MAX_TOKENS.get(question_type, DEFAULT_MAX_TOKENS),
+                temperature=PROCESSING_CONFIG.llm_temperature
             )
 
             answer = response.choices[0].message.content.strip()
@@ -179,7 +893,7 @@ class RAGAgent:
             # Post-process answer to ensure proper formatting
             answer = self._post_process_answer(answer, question_type)
 
-            logger.info(f"Generated answer for {question_type} question")
+            logger.debug("Generated answer for %s question", question_type)
 
             return answer
 
@@ -187,218 +901,120 @@ class RAGAgent:
             logger.error(f"Error generating answer: {str(e)}")
             return f"Error generating answer: {str(e)}"
 
-    def _create_question_prompt(
+    async def _generate_answer_async(
         self,
         question: str,
         question_type: str,
-        context: str,
+        context: List[str],
         options: Optional[List[str]] = None
     ) -> str:
         """
-        Create a question-specific prompt for the LLM.
+        Async counterpart of _generate_answer, paced by the LLM rate limit.
 
         Args:
             question: Question text
             question_type: Type of question
-            context: Retrieved context
+            context: Retrieved context chunks
             options: Question options (if applicable)
 
         Returns:
-            Formatted prompt string
+            Generated answer
         """
-        base_prompt = f"""
-Context:
-{context}
-
-Question: {question}
-"""
-
-        if question_type == QUESTION_TYPES.MULTIPLE_CHOICE_SINGLE:
-            if options:
-                options_str = "\n".join([f"{chr(65+i)}. {opt}" for i, opt in enumerate(options)])
-                base_prompt += f"""
-Original Options:
-{options_str}
-
-CRITICAL FORMATTING RULES:
-1. Copy the EXACT option list above
-2. Add ✓ symbol ONLY after the correct option
-3. Keep all other options unchanged
-4. Do NOT add "Answer:", explanations, or extra text
-5. Output ONLY the option list with one ✓ mark
-6. Put each option on a separate line
-
-REQUIRED OUTPUT FORMAT (each option on new line):
-A. [Option text]
-B. [Option text] ✓
-C. [Option text]
-D. [Option text]
-
-Example:
-A. Om Shanti Om
-B. Slumdog Millionaire ✓
-C. Rab Ne Bana Di Jodi
-D. 3 Idiots
-"""
-            else:
-                base_prompt += "\nProvide the correct answer in a concise format."
-
-        elif question_type == QUESTION_TYPES.MULTIPLE_CHOICE_MULTI:
-            if options:
-                options_str = "\n".join([f"{chr(65+i)}. {opt}" for i, opt in enumerate(options)])
-                base_prompt += f"""
-Original Options:
-{options_str}
-
-CRITICAL FORMATTING RULES:
-1. Copy the EXACT option list above
-2. Add ✓ symbol after ALL correct options
-3. Keep incorrect options unchanged
-4. Do NOT add "Answer:", explanations, or extra text
-5. Output ONLY the option list with ✓ marks
-6. Put each option on a separate line
+        try:
+            context_str = "\n\n".join(context) if context else "No relevant context found."
+            user_prompt = self._create_question_prompt(question, question_type, context_str, options)
 
-REQUIRED OUTPUT FORMAT (each option on new line):
-A. [Option text] ✓
-B. [Option text]
-C. [Option text] ✓
-D. [Option text]
+            request = dict(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": RAG_SYSTEM_PROMPT},
+                    {"role": "user", "content": user_prompt}
+                ],
+                max_tokens=ANSWER_MAX_TOKENS.get(question_type, DEFAULT_MAX_TOKENS),
+                temperature=PROCESSING_CONFIG.llm_temperature
+            )
 
-Example:
-A. Karan Johar ✓
-B. Rakeysh Omprakash Mehra
-C. Aditya Chopra ✓
-D. Sanjay Leela Bhansali
-"""
+            await self._llm_limiter.acquire()
+            expected_lines = _expected_answer_lines(question_type, options)
+            if expected_lines:
+                answer = await self._stream_answer_async(request, question_type, expected_lines)
             else:
-                base_prompt += "\nProvide all correct answers with clear marking."
+                response = await self.mistral_async_client.chat.complete_async(**request)
+                answer = response.choices[0].message.content
 
-        elif question_type == QUESTION_TYPES.TRUE_FALSE:
-            base_prompt += f"""
-Original Statement: {question}
+            answer = self._post_process_answer(answer.strip(), question_type)
 
-CRITICAL FORMATTING RULES:
-1. Show both True and False options
-2. Mark the correct option with ✓ symbol
-3. Do NOT add "Answer:", explanations, or extra text
-4. Put each option on a separate line
-
-REQUIRED OUTPUT FORMAT:
-True ✓
-False
-(if statement is true)
-
-OR
+            logger.debug("Generated answer for %s question", question_type)
 
-True
-False ✓
-(if statement is false)
-
-Example for a false statement:
-True
-False ✓
-"""
-
-        elif question_type == QUESTION_TYPES.FILL_IN_BLANK:
-            base_prompt += f"""
-Original Text with Blanks: {question}
-
-CRITICAL: Take the original sentence/paragraph above and fill in ALL the blanks with correct answers.
-Your response should be the COMPLETE text with blanks replaced by answers.
-Do NOT write "Answer:" or provide separate words - show the full completed text.
-
-Example: "The movie _____ was directed by _____" becomes "The movie Lagaan was directed by Ashutosh Gowariker"
-"""
-
-        elif question_type == QUESTION_TYPES.MATCH_FOLLOWING:
-            base_prompt += f"""
-Original Question: {question}
-
-CRITICAL FORMATTING RULES:
-1. Show each matching pair on a separate line
-2. Use arrows (→) to connect items with their matches
-3. Number each matching pair (1., 2., 3., etc.)
-4. Do NOT add "Answer:" or explanations
-5. Put each match on a new line
-
-REQUIRED OUTPUT FORMAT:
-1. [Item A] → [Match X]
-2. [Item B] → [Match Y]
-3. [Item C] → [Match Z]
-
-Example:
-1. Dil Chahta Hai → Farhan Akhtar
-2. Lagaan → Ashutosh Gowariker
-3. Veer-Zaara → Yash Chopra
-4. Chak De! India → Shimit Amin
-5. Black Friday → Anurag Kashyap
-"""
-
-        elif question_type == QUESTION_TYPES.CHECKBOX:
-            if options:
-                options_str = "\n".join([f"☐ {opt}" for opt in options])
-                base_prompt += f"""
-Original Checkbox List:
-{options_str}
-
-CRITICAL: Reproduce the EXACT checkbox list above, but mark correct items with ☑ and keep incorrect items as ☐.
-Your response should be the complete checkbox list with appropriate markings.
-Do NOT write "Answer:" or any explanation - just the marked checkbox list.
-
-Format: ☑ Correct option 1  ☐ Incorrect option  ☑ Correct option 2
-"""
-            else:
-                base_prompt += "\nUse ☑ for correct items and ☐ for incorrect items."
-
-        elif question_type == QUESTION_TYPES.TABLE_COMPLETION:
-            base_prompt += f"""
-Original Question with Table: {question}
-
-CRITICAL: If the question contains a table structure, recreate the EXACT table with empty cells filled in.
-Maintain the table format and structure. Fill in missing data based on the context.
-Do NOT write "Answer:" - show the completed table.
+            return answer
 
-Example:
-| Movie | Director | Year |
-|-------|----------|------|
-| Lagaan | Ashutosh Gowariker | 2001 |
-| 3 Idiots | Rajkumar Hirani | 2009 |
-"""
+        except Exception as e:
+            logger.error(f"Error generating answer: {str(e)}")
+            return f"Error generating answer: {str(e)}"
 
-        elif question_type == QUESTION_TYPES.NUMERICAL_ANSWER:
-            base_prompt += "\nPlease provide the numerical answer with appropriate units if applicable. Be precise and concise."
+    async def _stream_answer_async(self, request: Dict[str, Any], question_type: str, expected_lines: int) -> str:
+        """
+        Stream an answer with a fixed number of lines and stop once all of them have arrived.
 
-        elif question_type == QUESTION_TYPES.DATE_TIME:
-            base_prompt += "\nPlease provide the specific date, year, or time period. Format dates clearly (e.g., 'Year: 2001' or 'Period: 2000-2010')."
+        Args:
+            request: Chat completion arguments
+            question_type: Type of question
+            expected_lines: Number of complete answer lines that end the answer
 
-        elif question_type == QUESTION_TYPES.ORDERING_SEQUENCE:
-            base_prompt += "\nPlease provide the correct chronological or logical order. Number the items clearly (1, 2, 3, etc.)."
+        Returns:
+            Raw answer text
+        """
+        is_answer_line = _ANSWER_LINE_CHECKS[question_type]
+        parts = []
 
-        elif question_type == QUESTION_TYPES.CATEGORIZATION:
-            base_prompt += "\nPlease categorize or classify the items mentioned. Provide clear categories and explain the classification criteria."
+        async with await self.mistral_async_client.chat.stream_async(**request) as stream:
+            async for event in stream:
+                delta = event.data.choices[0].delta.content
+                if not delta:
+                    continue
+                parts.append(delta)
 
-        elif question_type == QUESTION_TYPES.COMPARISON:
-            base_prompt += "\nPlease compare the items mentioned. Highlight similarities, differences, and key distinguishing features."
+                # Only newline-terminated lines are complete
+                if '\n' in delta:
+                    complete_lines = ''.join(parts).split('\n')[:-1]
+                    if sum(1 for line in complete_lines if is_answer_line(line.strip())) >= expected_lines:
+                        logger.debug("Stopped streaming after %d answer lines", expected_lines)
+                        break
 
-        elif question_type == QUESTION_TYPES.CAUSE_EFFECT:
-            base_prompt += "\nPlease explain the cause and effect relationship. Clearly identify what caused what and the resulting impact."
+        return ''.join(parts)
 
-        elif question_type == QUESTION_TYPES.DEFINITION:
-            base_prompt += "\nPlease provide a clear, accurate definition. Include key characteristics and context if relevant."
+    def _create_question_prompt(
+        self,
+        question: str,
+        question_type: str,
+        context: str,
+        options: Optional[List[str]] = None
+    ) -> str:
+        """
+        Create a question-specific prompt for the LLM.
 
-        elif question_type == QUESTION_TYPES.EXPLANATION:
-            base_prompt += "\nPlease provide a detailed explanation. Break down complex concepts and provide context for better understanding."
+        Args:
+            question: Question text
+            question_type: Type of question
+            context: Retrieved context
+            options: Question options (if applicable)
 
-        elif question_type == QUESTION_TYPES.ANALYSIS:
-            base_prompt += "\nPlease provide an analytical response. Examine the topic critically, considering multiple perspectives and implications."
+        Returns:
+            Formatted prompt string
+        """
+        base_prompt = BASE_PROMPT_TEMPLATE.substitute(context=context, question=question)
 
-        elif question_type == QUESTION_TYPES.EVALUATION:
-            base_prompt += "\nPlease provide an evaluative response. Assess the topic's significance, quality, impact, or value based on the available information."
+        if question_type in OPTIONLESS_PROMPTS and not options:
+            return base_prompt + OPTIONLESS_PROMPTS[question_type]
 
-        else:  # TEXTUAL_ANSWER (default)
-            base_prompt += "\nPlease provide a comprehensive answer based on the context provided."
+        if question_type == QuestionType.CHECKBOX:
+            options_str = "\n".join([f"☐ {opt}" for opt in options])
+        else:
+            options_str = "\n".join([f"{chr(65+i)}. {opt}" for i, opt in enumerate(options or [])])
 
-        return base_prompt
+        # Unknown types fall back to the textual answer instructions
+        template = PROMPT_TEMPLATES.get(question_type, PROMPT_TEMPLATES[QuestionType.TEXTUAL_ANSWER])
+        return base_prompt + template.substitute(question=question, options=options_str)
 
     def _post_process_answer(self, answer: str, question_type: str) -> str:
         """
@@ -411,120 +1027,139 @@ Example:
         Returns:
             Cleaned and formatted answer
         """
-        # Remove common unwanted prefixes
-        unwanted_prefixes = [
-            "Answer:", "answer:", "ANSWER:",
-            "The answer is:", "The correct answer is:",
-            "Based on the context:", "According to the context:"
-        ]
-
-        for prefix in unwanted_prefixes:
-            if answer.startswith(prefix):
-                answer = answer[len(prefix):].strip()
+        # Remove common unwanted prefixes; most answers have none, so one
+        # tuple check skips the loop
+        if answer.startswith(_UNWANTED_PREFIXES):
+            for prefix in _UNWANTED_PREFIXES:
+                if answer.startswith(prefix):
+                    answer = answer[len(prefix):].strip()
 
         # For multiple choice questions, ensure proper formatting
-        if question_type in [QUESTION_TYPES.MULTIPLE_CHOICE_SINGLE, QUESTION_TYPES.MULTIPLE_CHOICE_MULTI]:
-            import re
-
-            # If the answer has newlines, preserve them
+        if question_type in [QuestionType.MULTIPLE_CHOICE_SINGLE, QuestionType.MULTIPLE_CHOICE_MULTI]:
+            # If the answer has newlines, keep only the option lines
             if '\n' in answer:
-                # Split by newlines and clean each line
-                lines = answer.split('\n')
-                cleaned_lines = []
-                for line in lines:
-                    line = line.strip()
-                    if line and re.match(r'^[A-Z]\.', line):
-                        cleaned_lines.append(line)
-
-                if cleaned_lines:
-                    answer = '\n'.join(cleaned_lines)
+                answer = _keep_matching_lines(answer, _OPTION_LINE_RE.match)
             else:
-                # If no newlines, try to add them between options
-                # Remove excessive spaces
-                answer = re.sub(r'\s+', ' ', answer)
-                # Add newlines before option letters (but not the first one)
-                answer = re.sub(r'\s+([A-Z]\.)', r'\n\1', answer)
-                answer = answer.strip()
+                # Otherwise collapse spaces and put each option letter on its own line
+                answer = _OPTION_SPLIT_RE.sub(r'\n\1', _WHITESPACE_RE.sub(' ', answer)).strip()
 
         # For True/False questions, ensure proper formatting
-        elif question_type == QUESTION_TYPES.TRUE_FALSE:
-            import re
-
-            # If the answer has newlines, preserve them
+        elif question_type == QuestionType.TRUE_FALSE:
             if '\n' in answer:
-                # Split by newlines and clean each line
-                lines = answer.split('\n')
-                cleaned_lines = []
-                for line in lines:
-                    line = line.strip()
-                    if line and (line.startswith('True') or line.startswith('False')):
-                        cleaned_lines.append(line)
-
-                if cleaned_lines:
-                    answer = '\n'.join(cleaned_lines)
+                answer = _keep_matching_lines(answer, lambda line: line.startswith(('True', 'False')))
             else:
-                # If no newlines, try to format properly
-                # Remove excessive spaces
-                answer = re.sub(r'\s+', ' ', answer)
-                # Add newlines between True and False
-                answer = re.sub(r'\s+(True|False)', r'\n\1', answer)
-                answer = answer.strip()
+                answer = _TRUE_FALSE_SPLIT_RE.sub(r'\n\1', _WHITESPACE_RE.sub(' ', answer)).strip()
 
         # For Match the Following questions, ensure proper formatting
-        elif question_type == QUESTION_TYPES.MATCH_FOLLOWING:
-            import re
-
-            # If the answer has newlines, preserve them
+        elif question_type == QuestionType.MATCH_FOLLOWING:
             if '\n' in answer:
-                # Split by newlines and clean each line
-                lines = answer.split('\n')
-                cleaned_lines = []
-                for line in lines:
-                    line = line.strip()
-                    if line and ('→' in line or re.match(r'^\d+\.', line)):
-                        cleaned_lines.append(line)
-
-                if cleaned_lines:
-                    answer = '\n'.join(cleaned_lines)
+                answer = _keep_matching_lines(answer, lambda line: '→' in line or _NUMBERED_LINE_RE.match(line))
             else:
-                # If no newlines, try to add them between numbered items
-                # Remove excessive spaces
-                answer = re.sub(r'\s+', ' ', answer)
-                # Add newlines before numbered items (but not the first one)
-                answer = re.sub(r'\s+(\d+\.)', r'\n\1', answer)
-                answer = answer.strip()
+                answer = _NUMBERED_SPLIT_RE.sub(r'\n\1', _WHITESPACE_RE.sub(' ', answer)).strip()
 
         return answer
 
-def answer_all_questions(questions_json: Dict[str, Any], vector_store: VectorStore) -> Dict[str, Any]:
+def answer_all_questions(
+    questions_json: Dict[str, Any],
+    vector_store: VectorStore,
+    cache_namespace: str = None,
+    rag_agent: Optional[RAGAgent] = None
+) -> Dict[str, Any]:
     """
     Answer all questions in the JSON using RAG.
 
     Args:
         questions_json: JSON containing all extracted questions
         vector_store: Configured vector store
+        cache_namespace: Namespace for cached answers, e.g. a knowledge base hash
+        rag_agent: Agent to reuse across calls for the same knowledge base; a new one is created if None
+
+    Returns:
+        Updated JSON with answers
+    """
+    return asyncio.run(answer_all_questions_async(
+        questions_json, vector_store, cache_namespace=cache_namespace, rag_agent=rag_agent
+    ))
+
+async def answer_all_questions_async(
+    questions_json: Dict[str, Any],
+    vector_store: VectorStore,
+    concurrency: int = None,
+    cache_namespace: str = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    rag_agent: Optional[RAGAgent] = None
+) -> Dict[str, Any]:
+    """
+    Answer all questions concurrently using RAG.
+
+    Args:
+        questions_json: JSON containing all extracted questions
+        vector_store: Configured vector store
+        concurrency: Maximum number of questions in flight
+        cache_namespace: Namespace for cached answers, e.g. a knowledge base hash
+        progress_callback: Called with (questions_done, total_questions) as answers finish
+        rag_agent: Agent to reuse across calls for the same knowledge base; a new one is created if None
 
     Returns:
         Updated JSON with answers
     """
-    rag_agent = RAGAgent(vector_store)
+    # A reused agent keeps its retrieval, rerank and keyword caches between calls
+    rag_agent = rag_agent or RAGAgent(vector_store, cache_namespace=cache_namespace)
+    async with rag_agent:
+        semaphore = asyncio.Semaphore(concurrency or PROCESSING_CONFIG.rag_concurrency)
+
+        questions = questions_json["questions"]
+        total_questions = len(questions)
+
+        # Repeated questions are answered once and the answer is copied to the rest
+        groups: Dict[Tuple[str, str, Tuple[str, ...]], List[int]] = {}
+        for i, question_data in enumerate(questions):
+            groups.setdefault(_question_key(question_data), []).append(i)
+        unique_groups = list(groups.values())
+        logger.info(f"Starting to answer {total_questions} questions ({len(unique_groups)} unique)")
+
+        # All questions are embedded up front in a few batched requests instead of one each
+        query_embeddings = await rag_agent.embed_questions_async([questions[indices[0]] for indices in unique_groups])
+
+        # Embedded questions are then searched together in one Qdrant request; if that
+        # fails, or a question has no embedding, it is searched on its own later
+        similar_chunks: List[Optional[List[Dict[str, Any]]]] = [None] * len(unique_groups)
+        embedded = [n for n, embedding in enumerate(query_embeddings) if embedding is not None]
+        if embedded:
+            batch_hits = await asyncio.to_thread(
+                vector_store.search_similar_batch,
+                [query_embeddings[n] for n in embedded],
+                PROCESSING_CONFIG.top_k_results
+            )
+            if batch_hits is not None:
+                for n, hits in zip(embedded, batch_hits):
+                    similar_chunks[n] = hits
+
+        questions_done = 0
+
+        async def answer_group(n: int, indices: List[int]):
+            nonlocal questions_done
+            async with semaphore:
+                logger.debug("Processing question %d/%d", n + 1, len(unique_groups))
+                answered = await rag_agent.answer_question_async(
+                    questions[indices[0]], query_embeddings[n], similar_chunks[n]
+                )
 
-    total_questions = len(questions_json["questions"])
-    logger.info(f"Starting to answer {total_questions} questions")
+            for i in indices[1:]:
+                for field in _ANSWER_FIELDS:
+                    if field in answered:
+                        questions[i][field] = answered[field]
 
-    for i, question_data in enumerate(questions_json["questions"]):
-        logger.info(f"Processing question {i+1}/{total_questions}")
-        answered_question = rag_agent.answer_question(question_data)
-        questions_json["questions"][i] = answered_question
+            questions_done += len(indices)
+            if progress_callback:
+                progress_callback(questions_done, total_questions)
 
-        # Add 1-second delay between questions to respect MistralAI rate limit (1 req/sec)
-        if i < total_questions - 1:  # Don't delay after the last question
-            logger.info("Waiting 1 second to respect MistralAI rate limit...")
-            time.sleep(1)
+        # Answers are written into the question dicts in place
+        await asyncio.gather(*(answer_group(n, indices) for n, indices in enumerate(unique_groups)))
 
-    # Update metadata
-    questions_json["answered_questions"] = total_questions
-    questions_json["rag_processing_complete"] = True
+        # Update metadata
+        questions_json["answered_questions"] = total_questions
+        questions_json["rag_processing_complete"] = True
 
-    logger.info(f"Completed answering all {total_questions} questions")
-    return questions_json
+        logger.info(f"Completed answering all {total_questions} questions")
+        return questions_json
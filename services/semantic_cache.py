@@ -0,0 +1,224 @@
+"""
+Semantic answer cache keyed by question embeddings.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+import numpy as np
+
+from config import PROCESSING_CONFIG
+from utils.vector_ring import VectorRing
+
+logger = logging.getLogger(__name__)
+
+def _normalize_question(question_text: str) -> str:
+    """Normalize question text for exact matching, ignoring case and whitespace differences."""
+    return " ".join(question_text.lower().split())
+
+def _variant_key(question_type: str, options: Optional[List[str]]) -> str:
+    """Build the key that separates questions with different types or options."""
+    return json.dumps([question_type, list(options or [])], ensure_ascii=False)
+
+class SemanticCache:
+    """Caches RAG answers so repeated or paraphrased questions skip the pipeline."""
+
+    def __init__(self, namespace: str, db_path: str = None, ttl_seconds: float = None):
+        """
+        Initialize semantic cache.
+
+        Args:
+            namespace: Cache namespace, typically a hash of the knowledge base
+            db_path: Path of the SQLite database backing the cache
+            ttl_seconds: Age after which entries are ignored
+        """
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds or PROCESSING_CONFIG.semantic_cache_ttl
+        self.db_path = db_path or PROCESSING_CONFIG.semantic_cache_path
+
+        self._lock = threading.Lock()
+        self._exact: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Newest entries, keyed by unit-length question embeddings; older ones stay on disk only
+        self._ring = VectorRing(PROCESSING_CONFIG.semantic_cache_size)
+
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                namespace TEXT NOT NULL,
+                question_text TEXT NOT NULL,
+                variant TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                answer TEXT NOT NULL,
+                sources TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        # Loading filters and sorts by age within a namespace, which this index covers
+        self._conn.execute("DROP INDEX IF EXISTS idx_answers_namespace")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_answers_namespace_created ON answers (namespace, created_at)"
+        )
+        self._conn.commit()
+        self._load()
+
+    def _load(self):
+        """Delete expired entries, then load unexpired ones for this namespace into memory."""
+        cutoff = time.time() - self.ttl_seconds
+        purged = self._conn.execute("DELETE FROM answers WHERE created_at < ?", (cutoff,)).rowcount
+        self._conn.commit()
+        if purged:
+            logger.info(f"Deleted {purged} expired cached answers")
+
+        rows = self._conn.execute(
+            "SELECT question_text, variant, embedding, answer, sources, created_at "
+            "FROM answers WHERE namespace = ? AND created_at >= ? "
+            "ORDER BY created_at DESC LIMIT ?",
+            (self.namespace, cutoff, self._ring.capacity)
+        ).fetchall()
+
+        # Added oldest first, so the ring overwrites in age order afterwards
+        for question_text, variant, embedding, answer, sources, created_at in reversed(rows):
+            entry = {
+                "question_text": question_text,
+                "variant": variant,
+                "answer": answer,
+                "sources": json.loads(sources),
+                "created_at": created_at
+            }
+            self._add_entry(entry, np.frombuffer(embedding, dtype=np.float32))
+
+        logger.info(f"Loaded {len(self._ring)} cached answers for namespace {self.namespace}")
+
+    def _add_entry(self, entry: Dict[str, Any], vector: np.ndarray):
+        """Index an entry in memory, dropping the exact-match key of any entry it overwrites."""
+        evicted = self._ring.add(vector, entry)
+        if evicted is not None:
+            evicted_key = (_normalize_question(evicted["question_text"]), evicted["variant"])
+            if self._exact.get(evicted_key) is evicted:
+                del self._exact[evicted_key]
+        self._exact[(_normalize_question(entry["question_text"]), entry["variant"])] = entry
+
+    def _is_fresh(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry["created_at"] <= self.ttl_seconds
+
+    def lookup_exact(
+        self,
+        question_text: str,
+        question_type: str,
+        options: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached answer for the same question text, ignoring case and whitespace.
+
+        Args:
+            question_text: Question text
+            question_type: Type of question
+            options: Question options (if applicable)
+
+        Returns:
+            Cached entry with answer and sources, or None on miss
+        """
+        entry = self._exact.get((_normalize_question(question_text), _variant_key(question_type, options)))
+        if entry and self._is_fresh(entry):
+            return entry
+        return None
+
+    def lookup(
+        self,
+        embedding: Union[np.ndarray, List[float]],
+        question_type: str,
+        options: Optional[List[str]] = None,
+        threshold: float = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached answer for a semantically similar question.
+
+        Args:
+            embedding: Question embedding
+            question_type: Type of question
+            options: Question options (if applicable)
+            threshold: Minimum cosine similarity for a hit
+
+        Returns:
+            Cached entry with answer and sources, or None on miss
+        """
+        threshold = threshold or PROCESSING_CONFIG.semantic_cache_threshold
+        if not len(self._ring):
+            return None
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+
+        # Stored vectors are unit length, so a dot product is the cosine similarity
+        similarities = self._ring.similarities(query / norm)
+        variant = _variant_key(question_type, options)
+
+        for index in np.argsort(similarities)[::-1]:
+            if similarities[index] < threshold:
+                break
+            entry = self._ring.values[index]
+            if entry["variant"] == variant and self._is_fresh(entry):
+                logger.info("Semantic cache hit (similarity %.3f)", similarities[index])
+                return entry
+
+        return None
+
+    def put(
+        self,
+        question_text: str,
+        question_type: str,
+        options: Optional[List[str]],
+        embedding: Union[np.ndarray, List[float]],
+        answer: str,
+        sources: List[str]
+    ):
+        """
+        Store an answer in the cache.
+
+        Args:
+            question_text: Question text
+            question_type: Type of question
+            options: Question options (if applicable)
+            embedding: Question embedding
+            answer: Generated answer
+            sources: Context chunks the answer was based on
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return
+        vector = vector / norm
+
+        entry = {
+            "question_text": question_text,
+            "variant": _variant_key(question_type, options),
+            "answer": answer,
+            "sources": sources,
+            "created_at": time.time()
+        }
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO answers VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.namespace,
+                    entry["question_text"],
+                    entry["variant"],
+                    vector.tobytes(),
+                    answer,
+                    json.dumps(sources, ensure_ascii=False),
+                    entry["created_at"]
+                )
+            )
+            self._conn.commit()
+
+            self._add_entry(entry, vector)
@@ -1,16 +1,25 @@
 """
 Vector store service using Qdrant for similarity search.
 """
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, PointStruct, Filter, FieldCondition, Range
+from qdrant_client.models import (
+    VectorParams, Distance, Filter, FieldCondition, Range,
+    CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    SearchParams, QuantizationSearchParams, SearchRequest
+)
 import numpy as np
 
 from config import API_CONFIG, PROCESSING_CONFIG
 
 logger = logging.getLogger(__name__)
 
+# Payload fields returned by searches; char_count and embedding_model are never read back
+_SEARCH_PAYLOAD_FIELDS = ["text", "section", "metadata"]
+
 class VectorStore:
     """Manages vector storage and retrieval using Qdrant."""
     
@@ -24,6 +33,7 @@ class VectorStore:
         self.client = QdrantClient(
             url=API_CONFIG.qdrant_url,
             api_key=API_CONFIG.qdrant_api_key,
+            prefer_grpc=PROCESSING_CONFIG.qdrant_prefer_grpc,
         )
         self.collection_name = collection_name or PROCESSING_CONFIG.collection_name
         self.embedding_dimension = PROCESSING_CONFIG.embedding_dimension
@@ -55,6 +65,18 @@ class VectorStore:
                     return True
             
             # Create new collection
+            # Qdrant keeps the float32 vectors as the master copy and searches
+            # the int8 copy in RAM, rescoring the top candidates
+            quantization_config = None
+            if PROCESSING_CONFIG.vector_quantization:
+                quantization_config = ScalarQuantization(
+                    scalar=ScalarQuantizationConfig(
+                        type=ScalarType.INT8,
+                        quantile=PROCESSING_CONFIG.quantization_quantile,
+                        always_ram=True
+                    )
+                )
+
             logger.info(f"Creating collection: {self.collection_name}")
             self.client.create_collection(
                 collection_name=self.collection_name,
@@ -62,6 +84,7 @@ class VectorStore:
                     size=self.embedding_dimension,
                     distance=Distance.COSINE
                 ),
+                quantization_config=quantization_config,
             )
             
             logger.info(f"Collection {self.collection_name} created successfully")
@@ -84,31 +107,26 @@ class VectorStore:
         try:
             logger.info(f"Storing {len(chunks)} chunks in vector store")
             
-            # Prepare points for insertion
-            points = []
-            for chunk in chunks:
-                point = PointStruct(
-                    id=chunk["chunk_id"],
-                    vector=chunk["embedding"],
-                    payload={
+            # The client splits the upload into batches itself, spreading them over
+            # worker processes when upsert_parallel > 1; vectors go in as one array
+            self.client.upload_collection(
+                collection_name=self.collection_name,
+                ids=[chunk["chunk_id"] for chunk in chunks],
+                vectors=np.asarray([chunk["embedding"] for chunk in chunks], dtype=np.float32),
+                payload=(
+                    {
                         "text": chunk["text"],
                         "section": chunk["section"],
                         "char_count": chunk["char_count"],
                         "metadata": chunk["metadata"],
                         "embedding_model": chunk.get("embedding_model", "unknown")
                     }
-                )
-                points.append(point)
-            
-            # Insert points in batches
-            batch_size = 100
-            for i in range(0, len(points), batch_size):
-                batch = points[i:i + batch_size]
-                self.client.upsert(
-                    collection_name=self.collection_name,
-                    points=batch
-                )
-                logger.info(f"Inserted batch {i//batch_size + 1}/{(len(points)-1)//batch_size + 1}")
+                    for chunk in chunks
+                ),
+                batch_size=PROCESSING_CONFIG.upsert_batch_size,
+                parallel=PROCESSING_CONFIG.upsert_parallel,
+                wait=True
+            )
             
             logger.info(f"Successfully stored {len(chunks)} chunks")
             return True
@@ -119,7 +137,7 @@ class VectorStore:
     
     def search_similar(
         self, 
-        query_embedding: List[float], 
+        query_embedding: Union[np.ndarray, List[float]], 
         top_k: int = None,
         score_threshold: float = None,
         section_filter: Optional[str] = None
@@ -128,7 +146,7 @@ class VectorStore:
         Search for similar chunks using vector similarity.
         
         Args:
-            query_embedding: Query vector embedding
+            query_embedding: Query vector embedding, preferably a float32 array
             top_k: Number of results to return
             score_threshold: Minimum similarity score
             section_filter: Filter by section name
@@ -158,27 +176,86 @@ class VectorStore:
                 query_vector=query_embedding,
                 query_filter=search_filter,
                 limit=top_k,
-                score_threshold=score_threshold
+                score_threshold=score_threshold,
+                search_params=self._search_params(),
+                with_payload=_SEARCH_PAYLOAD_FIELDS,
+                with_vectors=False
             )
             
             # Format results
-            results = []
-            for result in search_results:
-                chunk_data = {
-                    "chunk_id": result.id,
-                    "score": result.score,
-                    "text": result.payload["text"],
-                    "section": result.payload["section"],
-                    "metadata": result.payload["metadata"]
-                }
-                results.append(chunk_data)
+            results = [self._to_chunk(result) for result in search_results]
             
-            logger.info(f"Found {len(results)} similar chunks")
+            logger.info("Found %d similar chunks", len(results))
             return results
             
         except Exception as e:
             logger.error(f"Error searching similar chunks: {str(e)}")
             return []
+
+    def search_similar_batch(
+        self,
+        query_embeddings: List[Union[np.ndarray, List[float]]],
+        top_k: int = None,
+        score_threshold: float = None
+    ) -> Optional[List[List[Dict[str, Any]]]]:
+        """
+        Search for similar chunks for many queries in a single request.
+
+        Args:
+            query_embeddings: Query vector embeddings
+            top_k: Number of results to return per query
+            score_threshold: Minimum similarity score
+
+        Returns:
+            Similar chunks with scores for each query in order, or None on error
+        """
+        try:
+            top_k = top_k or PROCESSING_CONFIG.top_k_results
+            score_threshold = score_threshold or PROCESSING_CONFIG.similarity_threshold
+            search_params = self._search_params()
+
+            search_results = self.client.search_batch(
+                collection_name=self.collection_name,
+                requests=[
+                    SearchRequest(
+                        vector=np.asarray(embedding, dtype=np.float32).tolist(),
+                        limit=top_k,
+                        score_threshold=score_threshold,
+                        params=search_params,
+                        with_payload=_SEARCH_PAYLOAD_FIELDS,
+                        with_vector=False
+                    )
+                    for embedding in query_embeddings
+                ]
+            )
+
+            results = [[self._to_chunk(result) for result in hits] for hits in search_results]
+
+            logger.info("Searched similar chunks for %d queries in one request", len(results))
+            return results
+
+        except Exception as e:
+            logger.error(f"Error batch searching similar chunks: {str(e)}")
+            return None
+
+    def _search_params(self) -> SearchParams:
+        """Search parameters shared by single and batched searches."""
+        return SearchParams(
+            quantization=QuantizationSearchParams(
+                rescore=PROCESSING_CONFIG.quantization_rescore,
+                oversampling=PROCESSING_CONFIG.quantization_oversampling
+            )
+        )
+
+    def _to_chunk(self, result) -> Dict[str, Any]:
+        """Convert a Qdrant search hit into a chunk dictionary."""
+        return {
+            "chunk_id": result.id,
+            "score": result.score,
+            "text": result.payload["text"],
+            "section": result.payload["section"],
+            "metadata": result.payload["metadata"]
+        }
     
     def get_collection_info(self) -> Dict[str, Any]:
         """
@@ -200,6 +277,89 @@ class VectorStore:
             logger.error(f"Error getting collection info: {str(e)}")
             return {}
     
+    def get_all_texts(self) -> List[str]:
+        """
+        Get the text of every stored chunk.
+
+        Returns:
+            Chunk texts, or an empty list on error
+        """
+        try:
+            texts = []
+            offset = None
+            while True:
+                points, offset = self.client.scroll(
+                    collection_name=self.collection_name,
+                    limit=PROCESSING_CONFIG.upsert_batch_size,
+                    offset=offset,
+                    with_payload=["text"],
+                    with_vectors=False
+                )
+                texts.extend(point.payload["text"] for point in points)
+                if offset is None:
+                    return texts
+
+        except Exception as e:
+            logger.error(f"Error reading chunk texts: {str(e)}")
+            return []
+
+    def get_kb_signature(self) -> Optional[str]:
+        """
+        Get the signature of the knowledge base stored in the collection.
+
+        The signature is kept as a collection alias so it never shows up in search results.
+
+        Returns:
+            Stored signature, or None if the collection is missing or unsigned
+        """
+        try:
+            if not self.client.collection_exists(self.collection_name):
+                return None
+
+            prefix = f"{self.collection_name}_kb_"
+            aliases = self.client.get_collection_aliases(self.collection_name).aliases
+            for alias in aliases:
+                if alias.alias_name.startswith(prefix):
+                    return alias.alias_name[len(prefix):]
+            return None
+
+        except Exception as e:
+            logger.error(f"Error reading knowledge base signature: {str(e)}")
+            return None
+
+    def set_kb_signature(self, kb_signature: str) -> bool:
+        """
+        Record the signature of the knowledge base stored in the collection.
+
+        Args:
+            kb_signature: Signature from compute_kb_signature
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            prefix = f"{self.collection_name}_kb_"
+            aliases = self.client.get_collection_aliases(self.collection_name).aliases
+            operations = [
+                DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias.alias_name))
+                for alias in aliases
+                if alias.alias_name.startswith(prefix)
+            ]
+            operations.append(
+                CreateAliasOperation(
+                    create_alias=CreateAlias(
+                        collection_name=self.collection_name,
+                        alias_name=f"{prefix}{kb_signature}"
+                    )
+                )
+            )
+            self.client.update_collection_aliases(change_aliases_operations=operations)
+            return True
+
+        except Exception as e:
+            logger.error(f"Error storing knowledge base signature: {str(e)}")
+            return False
+
     def delete_collection(self) -> bool:
         """
         Delete the collection.
@@ -215,25 +375,53 @@ class VectorStore:
             logger.error(f"Error deleting collection: {str(e)}")
             return False
 
+def compute_kb_signature(chunks: List[Dict[str, Any]]) -> str:
+    """
+    Compute a signature identifying the chunked knowledge base and how it is indexed.
+
+    Args:
+        chunks: List of chunks
+
+    Returns:
+        Hex digest of the chunk texts, embedding model and vector quantization
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for chunk in chunks:
+        digest.update(chunk["text"].encode("utf-8"))
+        digest.update(b"\x00")
+    digest.update(API_CONFIG.cohere_embed_model.encode("utf-8"))
+    if PROCESSING_CONFIG.vector_quantization:
+        digest.update(b"\x00sq8")
+    return digest.hexdigest()
+
 def setup_vector_store(chunks: List[Dict[str, Any]], force_recreate: bool = False) -> VectorStore:
     """
     Set up vector store with knowledge base chunks.
-    
+
+    The existing collection is reused when it already holds the same knowledge base.
+
     Args:
         chunks: List of chunks with embeddings
         force_recreate: Whether to recreate the collection
-        
+
     Returns:
         Configured VectorStore instance
     """
     vector_store = VectorStore()
-    
-    # Create collection
-    if not vector_store.create_collection(force_recreate=force_recreate):
+    kb_signature = compute_kb_signature(chunks)
+
+    if not force_recreate and vector_store.get_kb_signature() == kb_signature:
+        logger.info(f"Collection {vector_store.collection_name} already holds this knowledge base")
+        return vector_store
+
+    # A different knowledge base would leave stale points behind, so start fresh
+    if not vector_store.create_collection(force_recreate=True):
         raise RuntimeError("Failed to create vector store collection")
-    
+
     # Store chunks
     if not vector_store.store_chunks(chunks):
         raise RuntimeError("Failed to store chunks in vector store")
-    
+
+    vector_store.set_kb_signature(kb_signature)
+
     return vector_store
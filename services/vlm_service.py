@@ -1,18 +1,23 @@
 """
 VLM service for question extraction using SambaNova API.
 """
+import asyncio
 import openai
-import json
+import orjson
+import random
+import re
 import time
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from dataclasses import dataclass
 
 from config import API_CONFIG, PROCESSING_CONFIG, VLM_SYSTEM_PROMPT
+from utils import content_cache
+from utils.rate_limiter import RateLimiter
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(slots=True)
 class ExtractedQuestion:
     """Data class for extracted questions."""
     question_id: str
@@ -21,14 +26,91 @@ class ExtractedQuestion:
     options: Optional[List[str]]
     metadata: Dict[str, Any]
 
+# Markdown code fence the VLM often wraps its JSON in
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+
+# Characters that matter when finding where a JSON array ends
+_JSON_ARRAY_TOKEN_RE = re.compile(r'[\[\]"\\]')
+
+def _first_json_array(content: str) -> Optional[str]:
+    """
+    Find the first balanced JSON array in a VLM response.
+
+    Brackets inside JSON strings are ignored, so the array ends where it really
+    does even if prose with brackets follows it.
+
+    Args:
+        content: Raw response content
+
+    Returns:
+        Text of the array, or None if no complete array is found
+    """
+    start = content.find('[')
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = -1
+    for match in _JSON_ARRAY_TOKEN_RE.finditer(content, start):
+        i = match.start()
+        if i == escaped:
+            continue
+        char = match.group()
+        if in_string:
+            if char == '\\':
+                escaped = i + 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+            if depth == 0:
+                return content[start:i + 1]
+    return None
+
+def _retry_delay(error: Exception, previous_delay: float) -> float:
+    """
+    Seconds to wait before retrying a failed VLM call.
+
+    A Retry-After header from the server wins; otherwise the delay follows
+    decorrelated jitter, so pages that failed together do not retry together.
+
+    Args:
+        error: Exception raised by the failed attempt
+        previous_delay: Delay before the previous retry, or the base delay for the first one
+
+    Returns:
+        Delay in seconds
+    """
+    cap = PROCESSING_CONFIG.retry_backoff_cap
+    if isinstance(error, openai.APIStatusError):
+        retry_after = error.response.headers.get("retry-after")
+        try:
+            return min(cap, max(0.0, float(retry_after)))
+        except (TypeError, ValueError):
+            pass
+    return min(cap, random.uniform(PROCESSING_CONFIG.retry_backoff_base, previous_delay * 3))
+
 class VLMService:
     """Service for interacting with SambaNova VLM API."""
     
     def __init__(self):
         """Initialize VLM service with API configuration."""
+        # SDK retries are off: they would bypass the rate limiter and the backoff in
+        # the extraction loops, which are the only place requests are retried
         self.client = openai.OpenAI(
             api_key=API_CONFIG.sambanova_api_key,
             base_url=API_CONFIG.sambanova_base_url,
+            max_retries=0,
+        )
+        self.async_client = openai.AsyncOpenAI(
+            api_key=API_CONFIG.sambanova_api_key,
+            base_url=API_CONFIG.sambanova_base_url,
+            max_retries=0,
         )
         self.model = API_CONFIG.sambanova_model
         self.max_retries = PROCESSING_CONFIG.max_retries
@@ -44,69 +126,157 @@ class VLMService:
         Returns:
             List of extracted questions
         """
+        cache_key = self._page_cache_key(image_base64, page_number)
+        cached = content_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        delay = PROCESSING_CONFIG.retry_backoff_base
         for attempt in range(self.max_retries):
             try:
-                logger.info(f"Extracting questions from page {page_number}, attempt {attempt + 1}")
-                
+                logger.info("Extracting questions from page %d, attempt %d", page_number, attempt + 1)
+
                 response = self.client.chat.completions.create(
                     model=self.model,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": VLM_SYSTEM_PROMPT
-                        },
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "text",
-                                    "text": f"Extract all questions from this image (Page {page_number}). Return a valid JSON array as specified."
-                                },
-                                {
-                                    "type": "image_url",
-                                    "image_url": {"url": image_base64}
-                                }
-                            ]
-                        }
-                    ],
+                    messages=self._build_messages(image_base64, page_number),
                     temperature=PROCESSING_CONFIG.vlm_temperature,
                     top_p=PROCESSING_CONFIG.vlm_top_p
                 )
-                
-                content = response.choices[0].message.content
-                logger.debug(f"VLM response for page {page_number}: {content}")
-                
-                # Parse JSON response
-                questions_data = self._parse_vlm_response(content, page_number)
-                
-                # Convert to ExtractedQuestion objects
-                questions = []
-                for q_data in questions_data:
-                    question = ExtractedQuestion(
-                        question_id=q_data.get("question_id", f"page_{page_number}_q_{len(questions) + 1}"),
-                        question_text=q_data.get("question_text", ""),
-                        question_type=q_data.get("question_type", "textual_answer"),
-                        options=q_data.get("options"),
-                        metadata={
-                            **q_data.get("metadata", {}),
-                            "page_number": page_number,
-                            "extraction_attempt": attempt + 1
-                        }
-                    )
-                    questions.append(question)
-                
-                logger.info(f"Successfully extracted {len(questions)} questions from page {page_number}")
+
+                questions = self._questions_from_response(response, page_number, attempt)
+                if questions:
+                    content_cache.put(cache_key, questions)
                 return questions
-                
+
             except Exception as e:
                 logger.warning(f"Attempt {attempt + 1} failed for page {page_number}: {str(e)}")
                 if attempt == self.max_retries - 1:
                     logger.error(f"All attempts failed for page {page_number}")
                     return []
-                time.sleep(2 ** attempt)  # Exponential backoff
-        
+                delay = _retry_delay(e, delay)
+                time.sleep(delay)
+
         return []
-    
+
+    async def extract_questions_from_image_async(
+        self,
+        image_base64: str,
+        page_number: int,
+        rate_limiter: Optional[RateLimiter] = None
+    ) -> List[ExtractedQuestion]:
+        """
+        Async counterpart of extract_questions_from_image.
+
+        Args:
+            image_base64: Base64 encoded image
+            page_number: Page number for metadata
+            rate_limiter: Limiter every attempt, retries included, waits on before calling the VLM
+
+        Returns:
+            List of extracted questions
+        """
+        cache_key = self._page_cache_key(image_base64, page_number)
+        cached = content_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        delay = PROCESSING_CONFIG.retry_backoff_base
+        for attempt in range(self.max_retries):
+            try:
+                if rate_limiter:
+                    await rate_limiter.acquire()
+                logger.info("Extracting questions from page %d, attempt %d", page_number, attempt + 1)
+
+                response = await self.async_client.chat.completions.create(
+                    model=self.model,
+                    messages=self._build_messages(image_base64, page_number),
+                    temperature=PROCESSING_CONFIG.vlm_temperature,
+                    top_p=PROCESSING_CONFIG.vlm_top_p
+                )
+
+                questions = self._questions_from_response(response, page_number, attempt)
+                if questions:
+                    content_cache.put(cache_key, questions)
+                return questions
+
+            except Exception as e:
+                logger.warning(f"Attempt {attempt + 1} failed for page {page_number}: {str(e)}")
+                if attempt == self.max_retries - 1:
+                    logger.error(f"All attempts failed for page {page_number}")
+                    return []
+                delay = _retry_delay(e, delay)
+                await asyncio.sleep(delay)
+
+        return []
+
+    def _page_cache_key(self, image_base64: str, page_number: int) -> str:
+        """
+        Build the cache key for one page's extracted questions.
+
+        The page number is part of the prompt and of the question ids, so the
+        same image on another page is extracted again.
+
+        Args:
+            image_base64: Base64 encoded image
+            page_number: Page number for metadata
+
+        Returns:
+            Cache key covering the model, prompt, page number and image
+        """
+        prompt_hash = content_cache.content_hash(
+            f"{VLM_SYSTEM_PROMPT}\x00{page_number}\x00{image_base64}".encode()
+        )
+        return f"vlm_page:{self.model}:{prompt_hash}"
+
+    def _build_messages(self, image_base64: str, page_number: int) -> List[Dict[str, Any]]:
+        """Build the chat messages for extracting questions from one page image."""
+        return [
+            {
+                "role": "system",
+                "content": VLM_SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": f"Extract all questions from this image (Page {page_number}). Return a valid JSON array as specified."
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {"url": image_base64}
+                    }
+                ]
+            }
+        ]
+
+    def _questions_from_response(self, response, page_number: int, attempt: int) -> List[ExtractedQuestion]:
+        """Convert a VLM chat completion into extracted questions."""
+        content = response.choices[0].message.content
+        logger.debug("VLM response for page %d: %s", page_number, content)
+
+        # Parse JSON response
+        questions_data = self._parse_vlm_response(content, page_number)
+
+        # Convert to ExtractedQuestion objects
+        questions = []
+        for q_data in questions_data:
+            question = ExtractedQuestion(
+                question_id=q_data.get("question_id", f"page_{page_number}_q_{len(questions) + 1}"),
+                question_text=q_data.get("question_text", ""),
+                question_type=q_data.get("question_type", "textual_answer"),
+                options=q_data.get("options"),
+                metadata={
+                    **q_data.get("metadata", {}),
+                    "page_number": page_number,
+                    "extraction_attempt": attempt + 1
+                }
+            )
+            questions.append(question)
+
+        logger.info("Successfully extracted %d questions from page %d", len(questions), page_number)
+        return questions
+
     def _parse_vlm_response(self, content: str, page_number: int) -> List[Dict[str, Any]]:
         """
         Parse VLM response and extract JSON data.
@@ -119,16 +289,16 @@ class VLMService:
             List of question dictionaries
         """
         try:
-            # Try to find JSON in the response
-            content = content.strip()
-            
-            # Look for JSON array markers
-            start_idx = content.find('[')
-            end_idx = content.rfind(']') + 1
-            
-            if start_idx != -1 and end_idx != 0:
-                json_str = content[start_idx:end_idx]
-                questions_data = json.loads(json_str)
+            # Prefer the fenced block so brackets in prose before it are not mistaken for JSON
+            fence = _FENCE_RE.search(content)
+            if fence:
+                content = fence.group(1)
+
+            # Take the first complete JSON array; text around it is ignored
+            json_str = _first_json_array(content)
+
+            if json_str is not None:
+                questions_data = orjson.loads(json_str)
                 
                 if isinstance(questions_data, list):
                     return questions_data
@@ -139,31 +309,70 @@ class VLMService:
                 logger.warning(f"No JSON array found in response for page {page_number}")
                 return []
                 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"JSON parsing error for page {page_number}: {str(e)}")
-            logger.debug(f"Raw content: {content}")
+            logger.debug("Raw content: %s", content)
             return []
         except Exception as e:
             logger.error(f"Unexpected error parsing response for page {page_number}: {str(e)}")
             return []
 
-def extract_questions_from_images(images: List[tuple]) -> List[ExtractedQuestion]:
+def extract_questions_from_images(
+    images: List[tuple],
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> List[ExtractedQuestion]:
     """
     Extract questions from multiple images.
-    
+
     Args:
         images: List of (page_number, base64_image) tuples
-        
+        progress_callback: Called with (pages_done, total_pages) as pages finish
+
     Returns:
         List of all extracted questions
     """
+    return asyncio.run(extract_questions_from_images_async(images, progress_callback=progress_callback))
+
+async def extract_questions_from_images_async(
+    images: List[tuple],
+    max_concurrency: int = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> List[ExtractedQuestion]:
+    """
+    Extract questions from multiple images with concurrent VLM requests.
+
+    Args:
+        images: List of (page_number, base64_image) tuples
+        max_concurrency: Maximum number of pages in flight
+        progress_callback: Called with (pages_done, total_pages) as pages finish
+
+    Returns:
+        List of all extracted questions, in page order
+    """
     vlm_service = VLMService()
-    all_questions = []
-    
-    for page_number, image_base64 in images:
-        questions = vlm_service.extract_questions_from_image(image_base64, page_number)
-        all_questions.extend(questions)
-    
+    max_concurrency = max_concurrency or PROCESSING_CONFIG.vlm_batch_size
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    # Keeps requests within the per-minute quota; the first wave of pages starts at once
+    requests_per_minute = PROCESSING_CONFIG.vlm_requests_per_minute
+    rate_limiter = RateLimiter(60.0 / requests_per_minute if requests_per_minute > 0 else 0, burst=max_concurrency)
+    pages_done = 0
+
+    async def extract_page(page_number: int, image_base64: str) -> List[ExtractedQuestion]:
+        nonlocal pages_done
+        async with semaphore:
+            questions = await vlm_service.extract_questions_from_image_async(image_base64, page_number, rate_limiter)
+        pages_done += 1
+        if progress_callback:
+            progress_callback(pages_done, len(images))
+        return questions
+
+    # gather returns results in submission order, which keeps pages in order
+    page_results = await asyncio.gather(
+        *(extract_page(page_number, image_base64) for page_number, image_base64 in images)
+    )
+    all_questions = [question for questions in page_results for question in questions]
+
     logger.info(f"Total questions extracted: {len(all_questions)}")
     return all_questions
 
@@ -177,21 +386,18 @@ def questions_to_json(questions: List[ExtractedQuestion]) -> Dict[str, Any]:
     Returns:
         Structured JSON dictionary
     """
-    json_data = {
+    return {
         "total_questions": len(questions),
         "extraction_timestamp": time.time(),
-        "questions": []
+        "questions": [
+            {
+                "question_id": question.question_id,
+                "question_text": question.question_text,
+                "question_type": question.question_type,
+                "options": question.options,
+                "metadata": question.metadata,
+                "answer": None  # To be filled by RAG system
+            }
+            for question in questions
+        ]
     }
-    
-    for question in questions:
-        question_dict = {
-            "question_id": question.question_id,
-            "question_text": question.question_text,
-            "question_type": question.question_type,
-            "options": question.options,
-            "metadata": question.metadata,
-            "answer": None  # To be filled by RAG system
-        }
-        json_data["questions"].append(question_dict)
-    
-    return json_data
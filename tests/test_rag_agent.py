@@ -0,0 +1,55 @@
+"""
+Tests for the RAG agent's rerank short-circuits.
+"""
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from config import PROCESSING_CONFIG
+from services.rag_agent import RAGAgent
+from utils.vector_ring import VectorRing
+
+def _make_agent(hits):
+    """Build an agent without API clients, searching a fixed list of hits."""
+    agent = RAGAgent.__new__(RAGAgent)
+    agent.vector_store = mock.Mock()
+    agent.vector_store.search_similar.return_value = hits
+    agent.cohere_client = mock.Mock()
+    agent._retrieval_cache = VectorRing(0)
+    agent._rerank_scores = {}
+    return agent
+
+def _hits(top_text):
+    """More hits than rerank_top_n, none scoring above the confident threshold."""
+    return [
+        {"text": top_text if i == 0 else f"chunk {i}", "score": 0.5 - i * 0.01}
+        for i in range(PROCESSING_CONFIG.rerank_top_n + 3)
+    ]
+
+class LiteralLookupRerankTest(unittest.TestCase):
+    """A question whose quoted phrases appear in the top hit is not reranked."""
+
+    def test_quoted_phrase_in_top_hit_skips_rerank(self):
+        hits = _hits("Lagaan was released in 2001 and was nominated for an Oscar.")
+        agent = _make_agent(hits)
+
+        context = agent._retrieve_context_with_reranking(
+            'Which film "was nominated for an Oscar"?', np.ones(4, dtype=np.float32)
+        )
+
+        agent.cohere_client.rerank.assert_not_called()
+        self.assertEqual(context, [hit["text"] for hit in hits[:PROCESSING_CONFIG.rerank_top_n]])
+
+    def test_quoted_phrase_missing_from_top_hit_reranks(self):
+        agent = _make_agent(_hits("Lagaan was released in 2001."))
+        agent.cohere_client.rerank.return_value = mock.Mock(results=[])
+
+        agent._retrieve_context_with_reranking(
+            'Which film "was nominated for an Oscar"?', np.ones(4, dtype=np.float32)
+        )
+
+        agent.cohere_client.rerank.assert_called_once()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+On-disk cache for expensive pipeline results keyed by content hash.
+"""
+import hashlib
+import logging
+from typing import Any, Optional
+
+from diskcache import Cache
+
+from config import PROCESSING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+_cache: Optional[Cache] = None
+
+def _get_cache() -> Cache:
+    """Open the shared cache directory on first use."""
+    global _cache
+    if _cache is None:
+        _cache = Cache(PROCESSING_CONFIG.content_cache_dir)
+    return _cache
+
+def content_hash(data: bytes) -> str:
+    """
+    Hash file contents for use in cache keys.
+
+    Args:
+        data: Raw file bytes
+
+    Returns:
+        Hex digest of the contents
+    """
+    return hashlib.blake2b(data).hexdigest()
+
+def get(key: str) -> Optional[Any]:
+    """
+    Get a cached value.
+
+    Args:
+        key: Cache key
+
+    Returns:
+        Cached value, or None on miss or cache error
+    """
+    try:
+        value = _get_cache().get(key)
+    except Exception as e:
+        logger.warning(f"Error reading cache entry {key}: {str(e)}")
+        return None
+
+    if value is not None:
+        logger.info("Cache hit: %s", key)
+    return value
+
+def put(key: str, value: Any) -> bool:
+    """
+    Store a value in the cache.
+
+    Args:
+        key: Cache key
+        value: Picklable value to store
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        _get_cache().set(key, value, expire=PROCESSING_CONFIG.content_cache_ttl)
+        return True
+    except Exception as e:
+        logger.warning(f"Error writing cache entry {key}: {str(e)}")
+        return False
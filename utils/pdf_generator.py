@@ -9,9 +9,9 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.colors import black, blue, red, green
 from datetime import datetime
-import json
+import orjson
 
-from config import QUESTION_TYPES
+from config import QuestionType
 
 logger = logging.getLogger(__name__)
 
@@ -198,7 +198,7 @@ class PDFGenerator:
         has_checkbox = "☑" in answer or "☐" in answer
         has_arrow = "→" in answer
 
-        if question_type == QUESTION_TYPES.MULTIPLE_CHOICE_SINGLE or question_type == QUESTION_TYPES.MULTIPLE_CHOICE_MULTI:
+        if question_type == QuestionType.MULTIPLE_CHOICE_SINGLE or question_type == QuestionType.MULTIPLE_CHOICE_MULTI:
             if has_checkmark:
                 # Format-matched answer - show as completed question with proper formatting
                 # Split by option letters and format each option on a new line
@@ -253,7 +253,7 @@ class PDFGenerator:
                 # Fallback to traditional format
                 return f"<b>Answer:</b> {self._escape_html(answer)}"
 
-        elif question_type == QUESTION_TYPES.TRUE_FALSE:
+        elif question_type == QuestionType.TRUE_FALSE:
             if has_checkmark:
                 # Format-matched answer - show as completed question with proper formatting
                 clean_answer = answer.strip()
@@ -279,7 +279,7 @@ class PDFGenerator:
                 # Fallback to traditional format
                 return f"<b>Answer:</b> {self._escape_html(answer)}"
 
-        elif question_type == QUESTION_TYPES.FILL_IN_BLANK:
+        elif question_type == QuestionType.FILL_IN_BLANK:
             # Check if it's a complete sentence (format-matched) or just the missing words
             if len(answer.split()) > 3 and not answer.startswith("Answer:"):
                 # Looks like a complete sentence - format-matched
@@ -288,7 +288,7 @@ class PDFGenerator:
                 # Traditional format
                 return f"<b>Missing Words:</b> {self._escape_html(answer)}"
 
-        elif question_type == QUESTION_TYPES.MATCH_FOLLOWING:
+        elif question_type == QuestionType.MATCH_FOLLOWING:
             if has_arrow:
                 # Format-matched answer with arrows
                 clean_answer = answer.strip()
@@ -314,7 +314,7 @@ class PDFGenerator:
                 # Traditional format
                 return f"<b>Matches:</b><br/>{self._escape_html(answer)}"
 
-        elif question_type == QUESTION_TYPES.CHECKBOX:
+        elif question_type == QuestionType.CHECKBOX:
             if has_checkbox:
                 # Format-matched answer with checkboxes
                 return f"<b>Completed Checklist:</b><br/>{self._escape_html(answer)}"
@@ -322,7 +322,7 @@ class PDFGenerator:
                 # Traditional format
                 return f"<b>Answer:</b> {self._escape_html(answer)}"
 
-        elif question_type == QUESTION_TYPES.TABLE_COMPLETION:
+        elif question_type == QuestionType.TABLE_COMPLETION:
             # Check if answer contains table structure
             if "|" in answer and "---" in answer:
                 # Format-matched table answer
@@ -338,24 +338,24 @@ class PDFGenerator:
     def _format_question_type(self, question_type: str) -> str:
         """Format question type for display."""
         type_mapping = {
-            QUESTION_TYPES.MULTIPLE_CHOICE_SINGLE: "Multiple Choice (Single Answer)",
-            QUESTION_TYPES.MULTIPLE_CHOICE_MULTI: "Multiple Choice (Multiple Answers)",
-            QUESTION_TYPES.FILL_IN_BLANK: "Fill in the Blank",
-            QUESTION_TYPES.TRUE_FALSE: "True/False",
-            QUESTION_TYPES.MATCH_FOLLOWING: "Match the Following",
-            QUESTION_TYPES.TEXTUAL_ANSWER: "Textual Answer",
-            QUESTION_TYPES.CHECKBOX: "Checkbox",
-            QUESTION_TYPES.TABLE_COMPLETION: "Table Completion",
-            QUESTION_TYPES.NUMERICAL_ANSWER: "Numerical Answer",
-            QUESTION_TYPES.DATE_TIME: "Date/Time",
-            QUESTION_TYPES.ORDERING_SEQUENCE: "Ordering/Sequence",
-            QUESTION_TYPES.CATEGORIZATION: "Categorization",
-            QUESTION_TYPES.COMPARISON: "Comparison",
-            QUESTION_TYPES.CAUSE_EFFECT: "Cause & Effect",
-            QUESTION_TYPES.DEFINITION: "Definition",
-            QUESTION_TYPES.EXPLANATION: "Explanation",
-            QUESTION_TYPES.ANALYSIS: "Analysis",
-            QUESTION_TYPES.EVALUATION: "Evaluation"
+            QuestionType.MULTIPLE_CHOICE_SINGLE: "Multiple Choice (Single Answer)",
+            QuestionType.MULTIPLE_CHOICE_MULTI: "Multiple Choice (Multiple Answers)",
+            QuestionType.FILL_IN_BLANK: "Fill in the Blank",
+            QuestionType.TRUE_FALSE: "True/False",
+            QuestionType.MATCH_FOLLOWING: "Match the Following",
+            QuestionType.TEXTUAL_ANSWER: "Textual Answer",
+            QuestionType.CHECKBOX: "Checkbox",
+            QuestionType.TABLE_COMPLETION: "Table Completion",
+            QuestionType.NUMERICAL_ANSWER: "Numerical Answer",
+            QuestionType.DATE_TIME: "Date/Time",
+            QuestionType.ORDERING_SEQUENCE: "Ordering/Sequence",
+            QuestionType.CATEGORIZATION: "Categorization",
+            QuestionType.COMPARISON: "Comparison",
+            QuestionType.CAUSE_EFFECT: "Cause & Effect",
+            QuestionType.DEFINITION: "Definition",
+            QuestionType.EXPLANATION: "Explanation",
+            QuestionType.ANALYSIS: "Analysis",
+            QuestionType.EVALUATION: "Evaluation"
         }
         return type_mapping.get(question_type, question_type.replace("_", " ").title())
 
@@ -420,8 +420,8 @@ def save_json_backup(questions_json: Dict[str, Any], output_path: str) -> bool:
         True if successful, False otherwise
     """
     try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(questions_json, f, indent=2, ensure_ascii=False)
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(questions_json, option=orjson.OPT_INDENT_2))
 
         logger.info(f"JSON backup saved: {output_path}")
         return True
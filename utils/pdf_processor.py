@@ -4,15 +4,64 @@ PDF processing utilities for converting PDF pages to images.
 import fitz  # PyMuPDF
 import base64
 import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image
 from typing import List, Tuple, Optional
 import logging
 from pathlib import Path
 
 from config import PROCESSING_CONFIG
+from utils import content_cache
 
 logger = logging.getLogger(__name__)
 
+# PDF bytes for the current worker process, set once by _init_render_worker
+_worker_pdf_bytes: Optional[bytes] = None
+
+def _init_render_worker(pdf_bytes: bytes):
+    """Hand the PDF to a render worker once instead of with every page job."""
+    global _worker_pdf_bytes
+    _worker_pdf_bytes = pdf_bytes
+
+def _render_page(job: Tuple[int, int, str]) -> Tuple[int, str]:
+    """
+    Render a single page of the worker's PDF.
+
+    Args:
+        job: Tuple of (page_index, dpi, image_format)
+
+    Returns:
+        Tuple of (page_number, base64_image)
+    """
+    page_index, dpi, image_format = job
+    with fitz.open(stream=_worker_pdf_bytes, filetype="pdf") as doc:
+        return _page_to_image(doc.load_page(page_index), dpi, image_format)
+
+def _page_to_image(page, dpi: int, image_format: str) -> Tuple[int, str]:
+    """Rasterize a page and encode it as a base64 data URI."""
+    # Convert page to image
+    mat = fitz.Matrix(dpi/72, dpi/72)  # Scale factor for DPI
+    pix = page.get_pixmap(matrix=mat, alpha=False)
+
+    # Convert to PIL Image straight from the raw samples
+    img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+    # Convert to base64
+    buffer = io.BytesIO()
+    if image_format.upper() in ("JPEG", "JPG"):
+        img.save(buffer, format="JPEG", quality=PROCESSING_CONFIG.jpeg_quality, optimize=True)
+    else:
+        img.save(buffer, format=image_format)
+    img_base64 = base64.b64encode(buffer.getvalue()).decode()
+
+    return page.number + 1, f"data:image/{image_format.lower()};base64,{img_base64}"
+
+def _is_blank_page(page) -> bool:
+    """Check whether a page has no text, images or vector drawings, cheapest check first."""
+    return not page.get_text("text").strip() and not page.get_images() and not page.get_drawings()
+
 class PDFProcessor:
     """Handles PDF to image conversion and processing."""
     
@@ -24,7 +73,7 @@ class PDFProcessor:
             dpi: Resolution for image conversion
             image_format: Output image format (PNG, JPEG)
         """
-        self.dpi = dpi or PROCESSING_CONFIG.pdf_dpi
+        self.dpi = dpi or PROCESSING_CONFIG.pdf_dpi_display
         self.image_format = image_format or PROCESSING_CONFIG.image_format
         
     def pdf_to_images(self, pdf_path: str) -> List[Tuple[int, str]]:
@@ -38,37 +87,47 @@ class PDFProcessor:
             List of tuples (page_number, base64_image)
         """
         try:
-            doc = fitz.open(pdf_path)
-            images = []
-            
-            logger.info(f"Processing PDF with {len(doc)} pages")
-            
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                
-                # Convert page to image
-                mat = fitz.Matrix(self.dpi/72, self.dpi/72)  # Scale factor for DPI
-                pix = page.get_pixmap(matrix=mat)
-                
-                # Convert to PIL Image
-                img_data = pix.tobytes("png")
-                img = Image.open(io.BytesIO(img_data))
-                
-                # Convert to base64
-                buffer = io.BytesIO()
-                img.save(buffer, format=self.image_format)
-                img_base64 = base64.b64encode(buffer.getvalue()).decode()
-                
-                images.append((page_num + 1, f"data:image/{self.image_format.lower()};base64,{img_base64}"))
-                
-                logger.info(f"Processed page {page_num + 1}")
-                
-            doc.close()
-            return images
+            return self.pdf_bytes_to_images(Path(pdf_path).read_bytes())
             
         except Exception as e:
             logger.error(f"Error processing PDF {pdf_path}: {str(e)}")
             raise
+
+    def pdf_bytes_to_images(self, pdf_bytes: bytes, skip_blank: bool = False) -> List[Tuple[int, str]]:
+        """
+        Convert in-memory PDF pages to base64 encoded images, one process per core.
+        
+        Args:
+            pdf_bytes: Raw PDF file contents
+            skip_blank: Leave out pages with no text, images or drawings
+            
+        Returns:
+            List of tuples (page_number, base64_image)
+        """
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            logger.info(f"Processing PDF with {len(doc)} pages")
+
+            page_indices = list(range(len(doc)))
+            if skip_blank:
+                page_indices = [i for i in page_indices if not _is_blank_page(doc.load_page(i))]
+                if len(page_indices) < len(doc):
+                    logger.info(f"Skipping {len(doc) - len(page_indices)} blank pages")
+
+            workers = min(PROCESSING_CONFIG.pdf_render_workers or os.cpu_count() or 1, len(page_indices))
+            if workers <= 1:
+                # Not worth starting a pool for a single page or core
+                return [_page_to_image(doc.load_page(i), self.dpi, self.image_format) for i in page_indices]
+
+        jobs = [(page_index, self.dpi, self.image_format) for page_index in page_indices]
+        # Spawned rather than forked: forking the threaded Streamlit server can copy locks
+        # held by other threads into the workers, which then deadlock
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_render_worker,
+            initargs=(pdf_bytes,)
+        ) as executor:
+            return list(executor.map(_render_page, jobs))
     
     def get_pdf_info(self, pdf_path: str) -> dict:
         """
@@ -114,38 +173,62 @@ class PDFProcessor:
             logger.warning(f"PDF validation failed for {pdf_path}: {str(e)}")
             return False
 
-def process_uploaded_pdf(uploaded_file) -> Tuple[List[Tuple[int, str]], dict]:
+def process_pdf_bytes(pdf_bytes: bytes) -> Tuple[List[Tuple[int, str]], dict]:
     """
-    Process an uploaded PDF file from Streamlit.
+    Process in-memory PDF contents into images for the VLM.
+    
+    Pages are rendered at the VLM resolution and format rather than print
+    quality. Results are cached by content hash, so processing the same PDF
+    again skips rasterization.
     
     Args:
-        uploaded_file: Streamlit uploaded file object
+        pdf_bytes: Raw PDF file contents
         
     Returns:
         Tuple of (images_list, pdf_info)
     """
-    # Save uploaded file temporarily
-    temp_path = f"temp_{uploaded_file.name}"
-    
+    processor = PDFProcessor(
+        dpi=PROCESSING_CONFIG.pdf_dpi_vlm,
+        image_format=PROCESSING_CONFIG.vlm_image_format
+    )
+
+    cache_key = (
+        f"pdf:{content_cache.content_hash(pdf_bytes)}:{processor.dpi}:{processor.image_format}"
+        f":{PROCESSING_CONFIG.skip_blank_pages}"
+    )
+    cached = content_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        with open(temp_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        
-        processor = PDFProcessor()
-        
-        # Validate PDF
-        if not processor.validate_pdf(temp_path):
-            raise ValueError("Invalid PDF file")
-        
-        # Get PDF info
-        pdf_info = processor.get_pdf_info(temp_path)
-        
-        # Convert to images
-        images = processor.pdf_to_images(temp_path)
-        
-        return images, pdf_info
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            if len(doc) == 0:
+                raise ValueError("Invalid PDF file")
+            pdf_info = {
+                "page_count": len(doc),
+                "metadata": doc.metadata,
+                "file_size": len(pdf_bytes)
+            }
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.warning(f"PDF validation failed: {str(e)}")
+        raise ValueError("Invalid PDF file") from e
+
+    # Blank pages cannot hold questions, so they are neither rendered nor sent to the VLM
+    images = processor.pdf_bytes_to_images(pdf_bytes, skip_blank=PROCESSING_CONFIG.skip_blank_pages)
+
+    content_cache.put(cache_key, (images, pdf_info))
+    return images, pdf_info
+
+def process_uploaded_pdf(uploaded_file) -> Tuple[List[Tuple[int, str]], dict]:
+    """
+    Process an uploaded PDF file from Streamlit into images for the VLM.
+    
+    Args:
+        uploaded_file: Streamlit uploaded file object
         
-    finally:
-        # Clean up temporary file
-        if Path(temp_path).exists():
-            Path(temp_path).unlink()
+    Returns:
+        Tuple of (images_list, pdf_info)
+    """
+    return process_pdf_bytes(uploaded_file.getvalue())
@@ -0,0 +1,37 @@
+"""
+Token bucket rate limiting for concurrent async API calls.
+"""
+import asyncio
+import time
+
+class RateLimiter:
+    """Lets async calls start at most once per interval, with up to ``burst`` at once."""
+
+    def __init__(self, interval: float, burst: int = 1):
+        """
+        Initialize the limiter with a full bucket.
+
+        Args:
+            interval: Seconds for one call's token to refill, 0 for no limit
+            burst: Most calls that may start back to back
+        """
+        self.interval = interval
+        self.burst = burst
+        self._lock = asyncio.Lock()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self):
+        """Wait until a call may start and take its token."""
+        if self.interval <= 0:
+            return
+
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) / self.interval)
+            self._updated = now
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) * self.interval)
+                self._tokens = 1.0
+                self._updated = time.monotonic()
+            self._tokens -= 1
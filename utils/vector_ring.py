@@ -0,0 +1,64 @@
+"""
+Fixed-capacity store of unit vectors searched by cosine similarity.
+"""
+from typing import Any, List, Optional
+
+import numpy as np
+
+class VectorRing:
+    """Ring buffer of unit-length vectors and their values; the oldest is overwritten when full."""
+
+    def __init__(self, capacity: int):
+        """
+        Initialize an empty ring.
+
+        Args:
+            capacity: Most vectors kept
+        """
+        self.capacity = capacity
+        self.values: List[Any] = [None] * capacity
+        # Allocated on the first add, once the vector dimension is known
+        self._matrix: Optional[np.ndarray] = None
+        self._size = 0
+        self._next = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, vector: np.ndarray, value: Any) -> Any:
+        """
+        Store a unit-length vector and its value in place, without copying the others.
+
+        Args:
+            vector: Unit-length float32 vector
+            value: Value returned for matches of this vector
+
+        Returns:
+            Value of the entry that was overwritten, or None if there was room
+        """
+        if self.capacity <= 0:
+            return None
+        if self._matrix is None:
+            self._matrix = np.zeros((self.capacity, vector.shape[0]), dtype=np.float32)
+
+        evicted = self.values[self._next] if self._size == self.capacity else None
+        self._matrix[self._next] = vector
+        self.values[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        return evicted
+
+    def similarities(self, query: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of a unit-length query to every stored vector.
+
+        Args:
+            query: Unit-length float32 vector
+
+        Returns:
+            Similarities aligned with ``values``; empty if nothing is stored
+        """
+        if self._matrix is None:
+            return np.empty(0, dtype=np.float32)
+        # Slots fill from the start before wrapping, so the first _size rows are all in use
+        return self._matrix[:self._size] @ query